@@ -0,0 +1,88 @@
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+# The stage implementations as they stood before the performance work (revision
+# d1fbe97), for `run.py --reference`. The bodies are kept as they were; only the
+# hard-coded tickers and countries became arguments so they run on the synthetic
+# markets, and fillna(method='ffill'), which pandas no longer accepts, is ffill().
+
+REVISION = 'd1fbe97'
+
+
+def calculate_volatility(df, tickers):
+    for col in tickers:
+        df[f'{col}_volatility'] = df[col].pct_change().rolling(window=30).std() * (252**0.5)
+    return df
+
+
+def fill_and_trim(df):
+    return df.ffill().dropna()
+
+
+def preprocess_data(df):
+    df = df.ffill().dropna()
+    scaler = StandardScaler()
+    scaled_data = scaler.fit_transform(df)
+    return pd.DataFrame(scaled_data, index=df.index, columns=df.columns)
+
+
+def build_index(df):
+    pca = PCA(n_components=1)
+    principal_components = pca.fit_transform(df)
+    index = pd.Series(principal_components.flatten(), index=df.index, name='stability_index')
+    loadings = pd.Series(pca.components_[0], index=df.columns)
+    return index, loadings
+
+
+def build_indices(country_frames):
+    # Every run refit each country's index on its full history
+    return [build_index(preprocess_data(frame)) for frame in country_frames]
+
+
+def build_indices_daily(country_frames, days):
+    # The refits of `days` consecutive daily runs, each on the history up to its day
+    for stop in range(len(country_frames[0]) - days + 1, len(country_frames[0]) + 1):
+        build_indices([frame.iloc[:stop] for frame in country_frames])
+
+
+def calculate_stock_correlation(closes, index_data):
+    stock_df = closes.to_frame('close')
+    stock_df['stock_return'] = stock_df['close'].pct_change()
+    stock_df = stock_df.rename_axis('date').reset_index()
+    merged = pd.merge(index_data[['date', 'index_change']], stock_df[['date', 'stock_return']], on='date', how='inner')
+    merged = merged.dropna()
+    if len(merged) < 30:
+        return None, merged
+    return merged['index_change'].corr(merged['stock_return']), merged
+
+
+def categorize_stock(correlation, merged_data):
+    if correlation is None or pd.isna(correlation):
+        return None, {}
+    stock_returns = merged_data['stock_return'].tail(30)
+    category = None
+    if correlation > 0.02:
+        category = "High-Momentum Play"
+    elif correlation < -0.02:
+        category = "Resilient Defender"
+    metrics = {'avg_return_30d': round(stock_returns.mean() * 100, 2), 'volatility_30d': round(stock_returns.std() * 100, 2), 'data_points': len(merged_data)}
+    return category, metrics
+
+
+def stock_correlations(closes, index_changes, stock_country):
+    # One merge and correlation per stock against its country's index changes
+    results = []
+    for ticker in closes.columns:
+        country = stock_country[ticker]
+        index_data = index_changes[country].rename('index_change').rename_axis('date').reset_index()
+        correlation, merged = calculate_stock_correlation(closes[ticker], index_data)
+        category, metrics = categorize_stock(correlation, merged)
+        results.append({'ticker': ticker, 'country': country, 'correlation_to_index': correlation, 'category': category, **metrics})
+    return pd.DataFrame(results)
+
+
+def cumulative_monthly_returns(sector_data):
+    daily_returns = 1 + sector_data.pct_change()
+    monthly_returns = daily_returns.resample('ME').prod()
+    return (monthly_returns.cumprod() - 1).dropna()
@@ -0,0 +1,232 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+# Spans would only add noise (and a log file) to the timings
+os.environ.setdefault('EMSI_PROFILE', 'off')
+
+import numpy as np
+import pandas as pd
+
+import reference
+from backend import categorize_stocks
+from correlation import correlate_universe, returns_matrix, rolling_screener
+from features import add_volatility_features, cumulative_monthly_returns
+from incremental_index import IncrementalIndex, extend_index
+from panel import ffill_trimmed
+from schema import FeatureSchema
+from synthetic import SIZES, make_index_changes, make_market, make_registry
+
+# Offline benchmark suite. Every stage runs on synthetic data of a given size
+# (countries x stocks x years); the best-of-N wall time, throughput (input cells
+# per second) and traced peak memory are written to results/<revision>.json so
+# runs on different commits can be compared with --compare. --reference times the
+# implementations from before the performance work (reference.py) under the same
+# stage names; results/baseline.json is such a run.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+UPDATE_DAYS = 252
+
+
+def extend_indices(codes, states, frames, histories, data_dir):
+    # The daily pipeline path: restore each saved state, then extend the published history
+    for code, state, frame, history in zip(codes, states, frames, histories):
+        IncrementalIndex.from_dict(state).save(code, data_dir=data_dir)
+        extend_index(code, frame, history, data_dir=data_dir)
+
+
+def build_reference_cases(registry, market, cells):
+    """
+    The pre-series implementation of every stage that had one. The index was refit on
+    the full history on every run, so folding in UPDATE_DAYS new days took that many refits.
+    """
+    featured = reference.calculate_volatility(market.copy(), registry.market_tickers)
+    country_frames = [featured[[col for col in featured.columns if any(asset in str(col) for asset in (country.index, country.currency))]]
+                      for country in registry.countries]
+    closes = market[registry.stock_tickers]
+    index_changes = make_index_changes(registry, market.index)
+    dashboard_tickers = [ticker for code in registry.codes for ticker in registry.dashboard_stocks[code]]
+
+    return [
+        ('calculate_volatility', lambda: reference.calculate_volatility(market.copy(), registry.market_tickers), cells['calculate_volatility']),
+        ('preprocess', lambda: [reference.fill_and_trim(frame) for frame in country_frames], cells['preprocess']),
+        ('incremental_index_fit', lambda: reference.build_indices(country_frames), cells['incremental_index_fit']),
+        ('incremental_index_update', lambda: reference.build_indices_daily(country_frames, UPDATE_DAYS), cells['incremental_index_update']),
+        ('extend_index', lambda: reference.build_indices_daily(country_frames, UPDATE_DAYS), cells['extend_index']),
+        ('stock_correlation', lambda: reference.stock_correlations(closes, index_changes, registry.stock_country), cells['stock_correlation']),
+        ('dashboard_returns', lambda: reference.cumulative_monthly_returns(market[dashboard_tickers]), cells['dashboard_returns']),
+    ]
+
+
+def build_cases(registry, market, scratch_dir, use_reference=False):
+    """
+    (name, function, input cells) for every benchmarked stage, with inputs prepared up front.
+    """
+    featured = add_volatility_features(market, registry.market_tickers)
+    schema = FeatureSchema.build(featured.columns, registry)
+    country_frames = [featured[schema.columns(code)] for code in registry.codes]
+    clean_frames = [ffill_trimmed(frame) for frame in country_frames]
+
+    # Engines fitted up to the last UPDATE_DAYS rows, which the update cases then fold in
+    fitted = [IncrementalIndex.fit(frame.iloc[:-UPDATE_DAYS]) for frame in clean_frames]
+    states = [engine.to_dict() for engine, _ in fitted]
+    histories = [history for _, history in fitted]
+    update_cells = sum(frame.iloc[-UPDATE_DAYS:].size for frame in clean_frames)
+
+    returns = returns_matrix(market[registry.stock_tickers])
+    index_changes = make_index_changes(registry, market.index)
+    dashboard_tickers = [ticker for code in registry.codes for ticker in registry.dashboard_stocks[code]]
+    market_cells = market[registry.market_tickers].size
+
+    cases = [
+        ('calculate_volatility', lambda: add_volatility_features(market, registry.market_tickers), market_cells),
+        ('preprocess', lambda: [ffill_trimmed(frame) for frame in country_frames], sum(frame.size for frame in country_frames)),
+        ('incremental_index_fit', lambda: [IncrementalIndex.fit(frame) for frame in clean_frames], sum(frame.size for frame in clean_frames)),
+        ('incremental_index_update', lambda: [IncrementalIndex.from_dict(state).update(frame) for state, frame in zip(states, clean_frames)], update_cells),
+        ('extend_index', lambda: extend_indices(registry.codes, states, clean_frames, histories, scratch_dir), update_cells),
+        ('stock_correlation', lambda: categorize_stocks(correlate_universe(returns, index_changes, registry.stock_country)), returns.size),
+        ('rolling_screener', lambda: rolling_screener(returns, index_changes, registry.stock_country), returns.size),
+        ('dashboard_returns', lambda: cumulative_monthly_returns(market[dashboard_tickers]), market[dashboard_tickers].size),
+    ]
+    if use_reference:
+        # Same stage names and input cells, so --compare lines the two runs up
+        return build_reference_cases(registry, market, {name: cells for name, _, cells in cases})
+    return cases
+
+
+def measure(func, cells, repeat):
+    """
+    Best-of-`repeat` wall time after one untimed warm-up run (lazy imports, first-call
+    caches), then one traced run for the allocation peak.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    best = min(timings)
+    return {'seconds': round(best, 6), 'cells_per_s': round(cells / best), 'peak_mb': round(peak / 2 ** 20, 2), 'cells': int(cells)}
+
+
+def revision():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{rev}-dirty' if dirty else rev
+
+
+def run(sizes, repeat=3, only=None, seed=0, use_reference=False):
+    results = {}
+    for label, (countries, stocks, years) in sizes.items():
+        print(f"== {label}: {countries} countries x {stocks} stocks x {years} years ==")
+        registry = make_registry(countries, stocks)
+        market = make_market(registry, years, seed=seed)
+        results[label] = {}
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            for name, func, cells in build_cases(registry, market, scratch_dir, use_reference):
+                if only and name not in only:
+                    continue
+                try:
+                    # Stage functions print progress lines; keep the report readable
+                    with redirect_stdout(io.StringIO()):
+                        results[label][name] = measure(func, cells, repeat)
+                except Exception as e:
+                    # One broken stage should not hide the numbers of the others
+                    results[label][name] = {'error': repr(e)}
+                row = results[label][name]
+                if 'error' in row:
+                    print(f"  {name:<24} ERROR {row['error']}")
+                else:
+                    print(f"  {name:<24} {row['seconds']:>10.4f}s {row['cells_per_s']:>14,} cells/s {row['peak_mb']:>9.1f} MB")
+    return results
+
+
+def save_results(results, repeat, name=None, use_reference=False):
+    rev = f'{reference.REVISION}-reference' if use_reference else revision()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f'{name or rev}.json')
+    payload = {
+        'revision': rev,
+        'recorded': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"Saved results to {path}")
+    return path
+
+
+def compare(before_path, after_path, tolerance=0.10):
+    """
+    Prints before/after timings per size and stage; returns the stages slower than
+    `tolerance` (a fraction), which callers treat as regressions.
+    """
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'size':<8} {'stage':<24} {before['revision']:>12} {after['revision']:>12} {'ratio':>7}")
+    regressions = []
+    for label, stages in after['results'].items():
+        for name, row in stages.items():
+            old = before['results'].get(label, {}).get(name, {})
+            if 'seconds' not in row or 'seconds' not in old:
+                continue
+            ratio = row['seconds'] / old['seconds']
+            flag = ' REGRESSION' if ratio > 1 + tolerance else ''
+            print(f"{label:<8} {name:<24} {old['seconds']:>12.4f} {row['seconds']:>12.4f} {ratio:>7.2f}{flag}")
+            if flag:
+                regressions.append((label, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline EMSI stage benchmarks on synthetic markets.")
+    parser.add_argument('--sizes', default='small,medium', help=f"comma-separated presets: {', '.join(SIZES)}")
+    parser.add_argument('--custom', help="extra size as COUNTRIESxSTOCKSxYEARS, e.g. 20x100x15")
+    parser.add_argument('--only', help="comma-separated stage names to run")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="compare two result files instead of running")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--reference', action='store_true', help=f"time the implementations from before the performance work ({reference.REVISION})")
+    parser.add_argument('--name', help="result file name (default: the git revision); 'baseline' is the committed reference")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, tolerance=args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    sizes = {label: SIZES[label] for label in args.sizes.split(',') if label}
+    if args.custom:
+        sizes[args.custom] = tuple(int(part) for part in args.custom.lower().split('x'))
+    only = set(args.only.split(',')) if args.only else None
+    save_results(run(sizes, args.repeat, only, args.seed, args.reference), args.repeat, args.name, args.reference)
+
+
+if __name__ == "__main__":
+    main()
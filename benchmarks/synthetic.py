@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from registry import Registry
+
+# Synthetic market generator for offline benchmarks. Builds a registry of fake
+# countries and a unified-dataset-shaped frame: geometric Brownian motion prices
+# for every index, currency and stock (stocks load on their country's index
+# factor), plus annual macro indicators forward-filled onto the trading calendar.
+
+INDICATORS = {
+    'NY.GDP.MKTP.KD.ZG': 'GDP growth (annual %)',
+    'FP.CPI.TOTL.ZG': 'Inflation, consumer prices (annual %)',
+}
+
+SIZES = {
+    'small': (4, 10, 5),
+    'medium': (10, 50, 10),
+    'large': (50, 500, 20),
+}
+
+
+def make_registry(countries, stocks, start='2000-01-01'):
+    """
+    A registry of `countries` fake markets with `stocks` tickers each.
+    """
+    config = {'history_start': start, 'dashboard_stocks': min(5, stocks), 'indicators': INDICATORS, 'countries': []}
+    for c in range(countries):
+        code = f'C{c:02d}'
+        config['countries'].append({
+            'code': code,
+            'iso2': code[:2],
+            'name': f'Country {c:02d}',
+            'index': f'^IDX{c:02d}',
+            'currency': f'FX{c:02d}USD=X',
+            'stocks': [[f'S{c:02d}{s:03d}', f'Company {c:02d}-{s:03d}'] for s in range(stocks)],
+        })
+    return Registry(config)
+
+
+def _random_walk(rng, dates, columns, drift=0.0002, vol=0.015, factor=None, beta=None):
+    shocks = rng.normal(drift, vol, size=(len(dates), len(columns)))
+    if factor is not None:
+        shocks = shocks + factor * beta
+    prices = 100 * np.exp(np.cumsum(shocks, axis=0))
+    return pd.DataFrame(prices, index=dates, columns=columns)
+
+
+def make_market(registry, years, seed=0, holiday_rate=0.02):
+    """
+    Unified-dataset-shaped frame for the registry: macro tuple columns, index and
+    currency levels, and stock closes over `years` of business days. A small share of
+    prices is blanked out to mimic market holidays.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(registry.history_start, periods=years * 252, name='date')
+
+    index_shocks = rng.normal(0.0003, 0.012, size=(len(dates), len(registry.countries)))
+    indices = pd.DataFrame(100 * np.exp(np.cumsum(index_shocks, axis=0)), index=dates, columns=registry.index_tickers)
+    currencies = _random_walk(rng, dates, registry.currency_tickers, drift=0.0, vol=0.006)
+
+    stock_blocks = []
+    for i, country in enumerate(registry.countries):
+        tickers = [ticker for ticker, _ in country.stocks]
+        betas = rng.uniform(-0.5, 1.5, size=len(tickers))
+        stock_blocks.append(_random_walk(rng, dates, tickers, factor=index_shocks[:, [i]], beta=betas))
+    stocks = pd.concat(stock_blocks, axis=1) if stock_blocks else pd.DataFrame(index=dates)
+
+    prices = pd.concat([indices, currencies, stocks], axis=1)
+    prices = prices.mask(rng.random(prices.shape) < holiday_rate)
+
+    years_index = dates.year
+    macro = {}
+    for name in registry.indicators.values():
+        for country in registry.countries:
+            annual = pd.Series(rng.normal(3.0, 2.0, size=years_index.nunique()), index=np.unique(years_index))
+            macro[(name, country.name)] = annual.reindex(years_index).to_numpy()
+    macro = pd.DataFrame(macro, index=dates)
+    return pd.concat([macro, prices], axis=1)
+
+
+def make_index_changes(registry, dates, seed=1):
+    """
+    Daily stability index changes per country, as prepare_index_data would produce.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0.0, 0.05, size=(len(dates), len(registry.codes))), index=dates, columns=registry.codes)
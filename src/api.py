@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR, artifact_path, load_frame
+
+# Read-only JSON API over the published artifacts. Everything is loaded into memory
+# once: each country's index as date-sorted NumPy arrays (range queries are two
+# binary searches), country rows in a hash index, and screener results sorted by
+# correlation per (category, country) so threshold queries are one bisection.
+# Responses carry a strong ETag of their body and are memoized per data version;
+# a matching If-None-Match gets 304. The artifacts are re-stat'ed every
+# RELOAD_INTERVAL seconds and reloaded when the backend has rewritten them.
+
+HOST = '127.0.0.1'
+PORT = 8000
+RELOAD_INTERVAL = 30.0
+RESPONSE_CACHE_SIZE = 1024
+
+ARTIFACTS = ('full_stability_index', 'index_data', 'stock_screener_data', 'loading_intervals', 'explained_variance')
+CATEGORY_ALIASES = {'defenders': 'Resilient Defender', 'momentum': 'High-Momentum Play'}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def artifact_versions(data_dir=None):
+    """
+    (mtime, size) of every served artifact that exists, the key its responses are cached under.
+    """
+    versions = {}
+    for name in ARTIFACTS:
+        for path in (artifact_path(name, data_dir), os.path.join(data_dir or DATA_DIR, f'{name}.csv')):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                versions[name] = (stat.st_mtime_ns, stat.st_size)
+                break
+    return versions
+
+
+def _json_value(value):
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    if isinstance(value, (np.floating, float)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+
+def _records(df):
+    return [{key: _json_value(value) for key, value in row.items()} for row in df.to_dict('records')]
+
+
+def _parse_date(value, name):
+    try:
+        return np.datetime64(pd.Timestamp(value).normalize(), 'D')
+    except ValueError:
+        raise ApiError(400, f"Invalid {name} date: {value!r}")
+
+
+def _parse_float(value, name):
+    try:
+        return float(value)
+    except ValueError:
+        raise ApiError(400, f"Invalid {name}: {value!r}")
+
+
+class IndexStore:
+    """
+    In-memory snapshot of the published index, country rows, loadings and screener.
+    """
+
+    def __init__(self, data_dir=None):
+        self.versions = artifact_versions(data_dir)
+        if 'full_stability_index' not in self.versions or 'index_data' not in self.versions:
+            raise FileNotFoundError("No published index; run the backend before serving")
+
+        history = load_frame('full_stability_index', data_dir=data_dir)
+        history.index = pd.to_datetime(history.index, format='mixed')
+        history = history.sort_index()
+        self.series = {}
+        for code in history.columns:
+            values = history[code].dropna()
+            self.series[code] = (values.index.values.astype('datetime64[D]'), values.to_numpy(dtype=float))
+
+        index_data = load_frame('index_data', data_dir=data_dir)
+        self.countries = {row['country_code']: row for row in _records(index_data)}
+
+        self.loadings = {}
+        if 'loading_intervals' in self.versions:
+            intervals = load_frame('loading_intervals', data_dir=data_dir)
+            for code, group in intervals.groupby('country_code', sort=False):
+                self.loadings[code] = _records(group.drop(columns='country_code').sort_values('loading', ascending=False))
+        self.explained = {}
+        if 'explained_variance' in self.versions:
+            explained = load_frame('explained_variance', data_dir=data_dir)
+            self.explained = {row.pop('country_code'): row for row in _records(explained)}
+
+        # (category, country) -> correlations in ascending order and the matching rows;
+        # None stands for "any" in either position
+        self.screener = {}
+        if 'stock_screener_data' in self.versions:
+            screener = load_frame('stock_screener_data', data_dir=data_dir).sort_values('correlation_to_index', kind='stable')
+            rows = _records(screener)
+            correlations = screener['correlation_to_index'].to_numpy(dtype=float)
+            categories, countries = screener['category'].to_numpy(), screener['country'].to_numpy()
+            for key in {(category, country) for category in (None, *set(categories)) for country in (None, *set(countries))}:
+                mask = np.ones(len(rows), dtype=bool)
+                if key[0] is not None:
+                    mask &= categories == key[0]
+                if key[1] is not None:
+                    mask &= countries == key[1]
+                positions = np.flatnonzero(mask)
+                self.screener[key] = (correlations[positions], [rows[i] for i in positions])
+
+    def _country(self, code):
+        code = code.upper()
+        if code not in self.countries and code not in self.series:
+            raise ApiError(404, f"Unknown country: {code}")
+        return code
+
+    def index_range(self, code, start=None, end=None):
+        """
+        A country's index values with start <= date <= end (both optional).
+        """
+        code = self._country(code)
+        dates, values = self.series.get(code, (np.array([], dtype='datetime64[D]'), np.array([])))
+        lo = 0 if start is None else int(np.searchsorted(dates, _parse_date(start, 'start'), side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _parse_date(end, 'end'), side='right'))
+        return {
+            'country_code': code,
+            'dates': [str(date) for date in dates[lo:hi]],
+            'values': [_json_value(value) for value in values[lo:hi]],
+        }
+
+    def outlook(self):
+        """
+        Latest index value and outlook of every country.
+        """
+        fields = ('country_code', 'date', 'stability_index', 'outlook')
+        return [{field: row.get(field) for field in fields} for row in self.countries.values()]
+
+    def country(self, code):
+        """
+        A country's latest row with its drivers, bootstrap loading intervals and explained variance.
+        """
+        code = self._country(code)
+        return {**self.countries.get(code, {'country_code': code}), 'loadings': self.loadings.get(code, []), 'explained_variance': self.explained.get(code)}
+
+    def screen(self, category=None, country=None, below=None, above=None):
+        """
+        Screener rows with above < correlation < below, optionally for one category and country.
+        """
+        category = CATEGORY_ALIASES.get(category, category)
+        country = country.upper() if country else None
+        key = (category, country)
+        if key not in self.screener:
+            return []
+        correlations, rows = self.screener[key]
+        lo = 0 if above is None else int(np.searchsorted(correlations, _parse_float(above, 'above'), side='right'))
+        hi = len(rows) if below is None else int(np.searchsorted(correlations, _parse_float(below, 'below'), side='left'))
+        return rows[lo:hi]
+
+
+class IndexApi:
+    """
+    Routes requests to the current IndexStore, memoizing encoded responses per data version.
+    """
+
+    def __init__(self, data_dir=None, reload_interval=RELOAD_INTERVAL):
+        self.data_dir = data_dir
+        self.reload_interval = reload_interval
+        self.store = IndexStore(data_dir)
+        self.checked = time.monotonic()
+        self.responses = OrderedDict()
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Swaps in a new snapshot when the artifacts changed on disk (checked at most every reload_interval).
+        """
+        with self.lock:
+            if time.monotonic() - self.checked < self.reload_interval:
+                return
+            self.checked = time.monotonic()
+            if artifact_versions(self.data_dir) != self.store.versions:
+                print("Artifacts changed, reloading...")
+                self.store = IndexStore(self.data_dir)
+                self.responses.clear()
+
+    def route(self, store, path, query):
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        args = {key: values[-1] for key, values in parse_qs(query).items()}
+        if parts == ['health']:
+            return {'status': 'ok', 'versions': {name: list(version) for name, version in store.versions.items()}}
+        if parts == ['outlook']:
+            return store.outlook()
+        if len(parts) == 2 and parts[0] == 'index':
+            return store.index_range(parts[1], args.get('start'), args.get('end'))
+        if len(parts) == 2 and parts[0] == 'countries':
+            return store.country(parts[1])
+        if parts and parts[0] == 'screener' and len(parts) <= 2:
+            category = parts[1] if len(parts) == 2 else args.get('category')
+            return store.screen(category, args.get('country'), args.get('below'), args.get('above'))
+        raise ApiError(404, f"No route for /{'/'.join(parts)}")
+
+    def respond(self, target):
+        """
+        (status, body, etag) for a request target, served from the response cache when possible.
+        """
+        self.refresh()
+        with self.lock:
+            store = self.store
+            cached = self.responses.get(target)
+            if cached is not None:
+                self.responses.move_to_end(target)
+                return cached
+        url = urlsplit(target)
+        try:
+            status, payload = 200, self.route(store, url.path, url.query)
+        except ApiError as error:
+            status, payload = error.status, {'error': str(error)}
+        body = json.dumps(payload, separators=(',', ':'), allow_nan=False).encode()
+        response = (status, body, '"' + hashlib.sha1(body).hexdigest() + '"')
+        if status == 200:
+            with self.lock:
+                # Never cache a response of a snapshot that was swapped out meanwhile
+                if self.store is store:
+                    self.responses[target] = response
+                    while len(self.responses) > RESPONSE_CACHE_SIZE:
+                        self.responses.popitem(last=False)
+        return response
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, body, etag = self.server.api.respond(self.path)
+        matches = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        if status == 200 and (etag in matches or '*' in matches):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host=HOST, port=PORT, data_dir=None):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.api = IndexApi(data_dir)
+    return server
+
+
+def main(host=HOST, port=PORT):
+    server = make_server(host, port)
+    print(f"Serving the stability index API on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(port=int(sys.argv[1]) if len(sys.argv) > 1 else PORT)
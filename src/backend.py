@@ -1,63 +1,88 @@
-import pandas as pd
-import yfinance as yf
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-import wbdata
 import os
+import time
+from functools import partial
+
+import pandas as pd
 
-# STEP 1: Verify Stock Universe Definition
-STOCK_UNIVERSE = {
-    'BRA': [("VALE", "Vale"), ("PETR4.SA", "Petrobras"), ("ITUB", "Itaú Unibanco"), ("BBDC4.SA", "Bradesco"), ("ABEV3.SA", "Ambev"), ("WEGE3.SA", "WEG"), ("MGLU3.SA", "Magazine Luiza"), ("LREN3.SA", "Lojas Renner"), ("RENT3.SA", "Localiza"), ("GGBR4.SA", "Gerdau")],
-    'IND': [("RELIANCE.NS", "Reliance Industries"), ("TCS.NS", "Tata Consultancy"), ("HDB", "HDFC Bank"), ("INFY", "Infosys"), ("HINDUNILVR.NS", "Hindustan Unilever"), ("ICICIBANK.NS", "ICICI Bank"), ("KOTAKBANK.NS", "Kotak Mahindra Bank"), ("SBIN.NS", "State Bank of India"), ("BAJFINANCE.NS", "Bajaj Finance"), ("BHARTIARTL.NS", "Bharti Airtel")],
-    'ZAF': [("NPN.JO", "Naspers"), ("BHP", "BHP Group"), ("CFR.JO", "Compagnie Financière Richemont"), ("ANH.JO", "Anheuser-Busch InBev"), ("FSR.JO", "FirstRand"), ("GLN.JO", "Glencore"), ("SBK.JO", "Standard Bank"), ("VOD.JO", "Vodacom"), ("MTN.JO", "MTN Group"), ("SOL.JO", "Sasol")],
-    'POL': [("PKO.WA", "PKO Bank Polski"), ("PZU.WA", "PZU"), ("CDR.WA", "CD Projekt"), ("LPP.WA", "LPP"), ("DNP.WA", "Dino Polska"), ("KGH.WA", "KGHM Polska Miedź"), ("MBK.WA", "mBank"), ("PEO.WA", "Bank Pekao"), ("SPL.WA", "Santander Bank Polska"), ("TPE.WA", "Tauron Polska Energia")]
-}
+import backtest
+import bootstrap
+import gdelt
+import sentiment
+from correlation import SCREENER_THRESHOLD, categorize, correlate_universe, returns_matrix, rolling_screener
+from features import add_volatility_features
+from macro import DEFAULT_LAGS, lookback_start, release_frame, release_table
+from model import build_country_indices
+from panel import PANEL_DTYPE, MarketPanel
+from pipeline import Stage, run_pipeline
+from profiling import enable_profiling
+from price_store import PriceStore
+from providers import LiveProvider
+from registry import load_registry
+from schema import FeatureSchema
+from storage import artifact_path, enable_table_cache, load_frame, save_frame
 
-def fetch_world_bank_data(start_date, end_date, country_codes):
+# STEP 1: Stock Universe Definition (from the market registry)
+REGISTRY = load_registry()
+STOCK_UNIVERSE = REGISTRY.stock_universe
+STOCK_COUNTRY = REGISTRY.stock_country
+ROLLING_WINDOWS = (30, 60, 90)
+VOLATILITY_WINDOWS = (30,)
+MIN_DATA_POINTS = 30
+
+def fetch_world_bank_data(start_date, end_date, country_codes, provider=None, indicators=None):
     print("Fetching World Bank data...")
-    indicators = {'NY.GDP.MKTP.KD.ZG': 'GDP growth (annual %)', 'FP.CPI.TOTL.ZG': 'Inflation, consumer prices (annual %)'}
-    return wbdata.get_dataframe(indicators, country=country_codes, date=(pd.to_datetime(start_date), pd.to_datetime(end_date)))
+    return (provider or LiveProvider()).fetch_indicators(indicators or REGISTRY.indicators, country_codes, start_date, end_date)
 
-def fetch_yfinance_data(start_date, end_date, tickers):
+def fetch_yfinance_data(start_date, end_date, tickers, store, provider=None):
     print("Fetching Yahoo Finance data...")
-    return yf.download(tickers, start=start_date, end=end_date, auto_adjust=True)['Close']
+    store.refresh(tickers, end_date, provider=provider, start_date=start_date)
+    return store.closes(tickers, start_date, end_date)
 
-def calculate_volatility(df):
+def calculate_volatility(df, windows=VOLATILITY_WINDOWS):
     print("Calculating volatility...")
-    for col in df.columns:
-        if isinstance(col, str) and (col.startswith('^') or col.endswith('=X') or '.' in col or col.isupper()):
-            df[f'{col}_volatility'] = df[col].pct_change().rolling(window=30).std() * (252**0.5)
-    return df
-
-def preprocess_data(df):
-    df = df.fillna(method='ffill').dropna()
-    scaler = StandardScaler()
-    scaled_data = scaler.fit_transform(df)
-    return pd.DataFrame(scaled_data, index=df.index, columns=df.columns)
-
-def build_index(df):
-    pca = PCA(n_components=1)
-    principal_components = pca.fit_transform(df)
-    index = pd.Series(principal_components.flatten(), index=df.index, name='stability_index')
-    loadings = pd.Series(pca.components_[0], index=df.columns)
-    return index, loadings
-
-# STEP 2: Fix Stock Data Fetching
-def fetch_stock_data(ticker, start_date, end_date):
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(start=start_date, end=end_date)
+    return add_volatility_features(df, REGISTRY.market_tickers, windows=windows)
+
+# STEP 2: Batched Stock Data Fetching
+def fetch_stock_universe(tickers, start_date, end_date, store, provider=None, retries=2, backoff=1.0, min_rows=30):
+    """
+    Fetches every ticker in one batched price-store refresh, retrying tickers that came
+    back empty or errored with exponential backoff. Returns (histories, reports) where
+    reports holds the per-ticker status line printed by the screener.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    errors = {}
+    pending = tickers
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"Retrying {len(pending)} tickers in {delay:.1f}s (attempt {attempt + 1}/{retries + 1})...")
+            time.sleep(delay)
+        try:
+            store.refresh(pending, end_date, provider=provider, start_date=start_date)
+            errors = {}
+        except Exception as e:
+            errors = {ticker: e for ticker in pending}
+        stored = store.closes(pending, start_date, end_date)
+        pending = [ticker for ticker in pending if ticker in errors or ticker not in stored.columns]
+        if not pending:
+            break
+
+    closes = store.closes(tickers, start_date, end_date)
+    histories, reports = {}, {}
+    for ticker in tickers:
+        if ticker in errors:
+            reports[ticker] = f"  [ERROR] {ticker}: {str(errors[ticker])}"
+            continue
+        hist = closes[[ticker]].dropna().rename(columns={ticker: 'Close'}) if ticker in closes.columns else pd.DataFrame()
         if hist.empty:
-            print(f"  ⚠ {ticker}: No data returned from Yahoo Finance")
-            return None
-        if len(hist) < 30:
-            print(f"  ⚠ {ticker}: Only {len(hist)} days of data (minimum 30 required)")
-            return None
-        print(f"  [OK] {ticker}: Fetched {len(hist)} days of data")
-        return hist
-    except Exception as e:
-        print(f"  [ERROR] {ticker}: {str(e)}")
-        return None
+            reports[ticker] = f"  ⚠ {ticker}: No data returned from Yahoo Finance"
+        elif len(hist) < min_rows:
+            reports[ticker] = f"  ⚠ {ticker}: Only {len(hist)} days of data (minimum {min_rows} required)"
+        else:
+            reports[ticker] = f"  [OK] {ticker}: Fetched {len(hist)} days of data"
+            histories[ticker] = hist
+    print(f"Fetched {len(histories)}/{len(tickers)} stock histories in one batch")
+    return histories, reports
 
 # STEP 3: Fix Index Data Preparation
 def prepare_index_data(index_data):
@@ -68,47 +93,28 @@ def prepare_index_data(index_data):
     print(f"Index prepared: {len(index_data)} days from {index_data['date'].min()} to {index_data['date'].max()}")
     return index_data
 
-# STEP 4: Fix Date Alignment & Correlation Calculation
-def calculate_stock_correlation(stock_hist, index_data, ticker):
-    stock_df = stock_hist[['Close']].copy()
-    if stock_df.index.tz is not None:
-        stock_df.index = stock_df.index.tz_localize(None)
-    stock_df['stock_return'] = stock_df['Close'].pct_change()
-    stock_df = stock_df.reset_index()
-    stock_df.columns = ['date', 'close', 'stock_return']
-    
-    merged = pd.merge(index_data[['date', 'index_change']], stock_df[['date', 'stock_return']], on='date', how='inner')
-    merged = merged.dropna()
-    
-    print(f"  Aligned data points: {len(merged)} days")
-    if len(merged) < 30:
-        print(f"  ⚠ Insufficient aligned data (need 30+, have {len(merged)})")
-        return None, merged
-        
-    correlation = merged['index_change'].corr(merged['stock_return'])
-    print(f"  Correlation: {correlation:.3f}")
-    return correlation, merged
-
-# STEP 5: Fix Stock Categorization Logic
-def categorize_stock(correlation, merged_data):
-    if correlation is None or pd.isna(correlation):
-        return None, {}
-    
-    stock_returns = merged_data['stock_return'].tail(30)
-    avg_return_30d = stock_returns.mean() * 100
-    volatility_30d = stock_returns.std() * 100
-    
-    category = None
-    if correlation > 0.02:
-        category = "High-Momentum Play"
-    elif correlation < -0.02:
-        category = "Resilient Defender"
-        
-    metrics = {'avg_return_30d': round(avg_return_30d, 2), 'volatility_30d': round(volatility_30d, 2), 'data_points': len(merged_data)}
-    return category, metrics
+# STEP 4: Whole-Universe Date Alignment & Correlation Calculation
+def stock_returns(histories):
+    closes = pd.concat({ticker: hist['Close'] for ticker, hist in histories.items()}, axis=1)
+    return returns_matrix(closes)
+
+def calculate_stock_correlations(returns, index_changes):
+    """
+    Correlates every fetched stock with its country's index change in one aligned pass.
+    """
+    return correlate_universe(returns, index_changes, STOCK_COUNTRY)
+
+# STEP 5: Stock Categorization Logic
+def categorize_stocks(stats, threshold=SCREENER_THRESHOLD, min_points=MIN_DATA_POINTS):
+    stats = stats.copy()
+    stats['category'] = categorize(stats['correlation'], threshold)
+    stats.loc[stats['data_points'] < min_points, 'category'] = None
+    stats['avg_return_30d'] = (stats['mean_return'] * 100).round(2)
+    stats['volatility_30d'] = (stats['std_return'] * 100).round(2)
+    return stats
 
 # STEP 6: Add Comprehensive Debug Logging
-def process_stocks_for_country(country_code, index_data, start_date, end_date):
+def process_stocks_for_country(country_code, stats, reports, min_points=MIN_DATA_POINTS):
     print(f"\n{'='*60}\nPROCESSING COUNTRY: {country_code}\n{'='*60}")
     stocks = STOCK_UNIVERSE.get(country_code, [])
     print(f"Total stocks to process: {len(stocks)}")
@@ -118,24 +124,28 @@ def process_stocks_for_country(country_code, index_data, start_date, end_date):
     
     for ticker, company_name in stocks:
         print(f"\n--- {ticker} ({company_name}) ---")
-        stock_hist = fetch_stock_data(ticker, start_date, end_date)
-        if stock_hist is None:
+        print(reports.get(ticker, f"  ⚠ {ticker}: No data returned from Yahoo Finance"))
+        if ticker not in stats.index:
             skipped['no_data'] += 1
             continue
         
-        correlation, merged = calculate_stock_correlation(stock_hist, index_data, ticker)
-        if correlation is None:
+        row = stats.loc[ticker]
+        print(f"  Aligned data points: {row['data_points']} days")
+        if row['data_points'] < min_points or pd.isna(row['correlation']):
+            print(f"  ⚠ Insufficient aligned data (need {min_points}+, have {row['data_points']})")
             skipped['insufficient_alignment'] += 1
             continue
+        correlation = row['correlation']
+        print(f"  Correlation: {correlation:.3f}")
             
-        category, metrics = categorize_stock(correlation, merged)
-        if category is None:
+        category = row['category']
+        if pd.isna(category):
             print(f"  [INFO] Excluded: Weak correlation ({correlation:.3f})")
             skipped['weak_correlation'] += 1
             continue
             
         print(f"  [SUCCESS] Categorized as: {category}")
-        results.append({'country': country_code, 'ticker': ticker, 'company_name': company_name, 'correlation_to_index': round(correlation, 3), 'category': category, **metrics})
+        results.append({'country': country_code, 'ticker': ticker, 'company_name': company_name, 'correlation_to_index': round(correlation, 3), 'category': category, 'avg_return_30d': row['avg_return_30d'], 'volatility_30d': row['volatility_30d'], 'data_points': int(row['data_points'])})
         
     print(f"\n{'='*60}\nSUMMARY FOR {country_code}\n{'='*60}")
     print(f"[SUCCESS] Successfully categorized: {len(results)}")
@@ -145,68 +155,77 @@ def process_stocks_for_country(country_code, index_data, start_date, end_date):
     return results
 
 # STEP 7: Fix CSV Output Generation
-def save_stock_screener_data(all_results, output_file='stock_screener_data.csv'):
+def save_stock_screener_data(all_results, name='stock_screener_data'):
     if not all_results:
         print("[ERROR] No results to save.")
         return False
     
-    # Create the data directory if it doesn't exist
-    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-    os.makedirs(data_dir, exist_ok=True)
-    output_path = os.path.join(data_dir, output_file)
-    
     screener_df = pd.DataFrame(all_results)
-    screener_df = screener_df.sort_values(['country', 'category', 'correlation_to_index'], ascending=[True, True, False])
-    screener_df.to_csv(output_path, index=False)
+    screener_df = screener_df.sort_values(['country', 'category', 'correlation_to_index'], ascending=[True, True, False]).reset_index(drop=True)
+    output_path = save_frame(screener_df, name)
     
     print(f"\n{'='*60}\nFINAL OUTPUT\n{'='*60}")
     print(f"📁 Saved to: {output_path}\n📊 Total stocks: {len(screener_df)}\n\nBreakdown by country:")
-    for country in ['BRA', 'IND', 'ZAF', 'PL']:
+    for country in REGISTRY.codes:
         country_df = screener_df[screener_df['country'] == country]
         momentum = len(country_df[country_df['category'] == 'High-Momentum Play'])
         defender = len(country_df[country_df['category'] == 'Resilient Defender'])
         print(f"  {country}: {len(country_df)} total (Momentum: {momentum}, Defender: {defender})")
     return True
 
-def main():
-    start_date = "2020-01-01"
-    end_date = "2024-12-31"
-    countries = {"BRA": "BR", "IND": "IN", "ZAF": "ZA", "POL": "PL"}
-    stock_indices = ["^BVSP", "^NSEI", "^J203.JO", "^WIG20"]
-    currencies = ["BRLUSD=X", "INRUSD=X", "ZARUSD=X", "PLNUSD=X"]
-    
-    # --- Part 1: Index Computation (largely unchanged) ---
-    all_tickers = stock_indices + currencies
-    yfinance_data = fetch_yfinance_data(start_date, end_date, all_tickers)
-    world_bank_data = fetch_world_bank_data(start_date, end_date, list(countries.keys()))
-    world_bank_data = world_bank_data.unstack(level=0)
-    master_df = pd.concat([world_bank_data, yfinance_data], axis=1)
-    featured_df = calculate_volatility(master_df.copy())
-    
+# STEP 8: Pipeline Stages
+# Each stage reads and writes named artifacts so the pipeline runner can skip it
+# when neither its inputs nor its parameters changed since the last run.
+def fetch_stage(start_date, end_date, tickers, country_codes, indicators, release_lags, store=None, provider=None):
+    store = store or PriceStore()
+    yfinance_data = fetch_yfinance_data(start_date, end_date, tickers, store, provider)
+    # Macro values take effect when published, so fetch far enough back to know the value in force at the start
+    max_lag = max([*DEFAULT_LAGS.values(), *release_lags.values()])
+    world_bank_data = fetch_world_bank_data(lookback_start(start_date, max_lag), end_date, country_codes, provider, indicators)
+    macro = release_frame(release_table(world_bank_data, release_lags))
+    save_frame(MarketPanel(yfinance_data, macro, dtype=None).to_frame(), 'unified_dataset')
+
+def features_stage(windows, dtype, news=()):
+    # Market block in the compact panel dtype; macro columns are stored at their release rows only
+    panel = MarketPanel.from_frame(load_frame('unified_dataset', float_dtype=dtype), dtype)
+    # Daily news aggregates join the macro block; event and headline counts are 0 on days without news
+    counts = {gdelt.TONE_FEATURES['events'], sentiment.SENTIMENT_FEATURES['headlines']}
+    for name in news:
+        aggregates = load_frame(name)
+        panel = panel.with_macro(aggregates, counts=[column for column in aggregates.columns if column[0] in counts])
+    featured_df = panel.with_market(calculate_volatility(panel.market, windows)).to_frame()
+    save_frame(featured_df, 'featured_dataset')
+    FeatureSchema.build(featured_df.columns, REGISTRY).save('featured_dataset')
+
+def clean_feature_name(name):
+    name = str(name).replace("_volatility", " Volatility").replace("('", "").replace("', '", " (").replace("')", ")")
+    return name.title()
+
+def index_stage(anchors, refit=False, workers=None, executor='process'):
+    schema = FeatureSchema.load('featured_dataset')
+    try:
+        published = load_frame('full_stability_index')
+    except FileNotFoundError:
+        published = pd.DataFrame()
+
+    tasks = []
+    for country_code, anchor in anchors.items():
+        tasks.append({
+            'country_code': country_code,
+            'country_df': load_frame('featured_dataset', columns=schema.columns(country_code)),
+            'history': published[country_code] if country_code in published.columns else None,
+            'anchor': anchor,
+            'refit': refit,
+        })
+    results = build_country_indices(tasks, workers=workers, executor=executor)
+
     index_data_rows = []
-    all_indices = []
-    for i, country_code in enumerate(countries.keys()):
-        index_cols = [col for col in featured_df.columns if (stock_indices[i] in str(col) or currencies[i] in str(col))]
-        country_df = featured_df[index_cols]
-        processed_df = preprocess_data(country_df)
-        stability_index, loadings = build_index(processed_df)
-        stability_index.name = country_code
-        all_indices.append(stability_index)
-        
-        vol_7d = stability_index.pct_change().rolling(window=7).std().iloc[-1]
-        vol_14d = stability_index.pct_change().rolling(window=14).std().iloc[-1]
-        outlook = "Neutral"
-        if vol_7d > vol_14d * 1.5: outlook = "Cautious"
-        elif vol_7d < vol_14d * 0.75: outlook = "Bullish"
-        
+    for result in results:
+        stability_index, loadings = result['stability_index'], result['loadings']
         top_positive = loadings.nlargest(3)
         top_negative = loadings.nsmallest(3)
-        
-        def clean_feature_name(name):
-            name = str(name).replace("_volatility", " Volatility").replace("('", "").replace("', '", " (").replace("')", ")")
-            return name.title()
 
-        latest_index_data = {'date': stability_index.index[-1], 'country_code': country_code, 'stability_index': stability_index.iloc[-1], 'outlook': outlook}
+        latest_index_data = {'date': stability_index.index[-1], 'country_code': result['country_code'], 'stability_index': stability_index.iloc[-1], 'outlook': result['outlook']}
         for j in range(3):
             latest_index_data[f'positive_driver_{j+1}_name'] = clean_feature_name(top_positive.index[j])
             latest_index_data[f'positive_driver_{j+1}_value'] = top_positive.values[j]
@@ -214,30 +233,127 @@ def main():
             latest_index_data[f'negative_driver_{j+1}_value'] = top_negative.values[j]
         index_data_rows.append(latest_index_data)
 
-    full_index_history = pd.concat(all_indices, axis=1).reset_index().rename(columns={'index': 'date'})
-    
-    # Create the data directory if it doesn't exist
-    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-    os.makedirs(data_dir, exist_ok=True)
+    full_index_history = pd.concat([result['stability_index'] for result in results], axis=1)
+    save_frame(full_index_history.rename_axis('date'), 'full_stability_index')
+    save_frame(pd.DataFrame(index_data_rows), 'index_data')
 
-    full_index_history.to_csv(os.path.join(data_dir, 'full_stability_index.csv'), index=False)
-    pd.DataFrame(index_data_rows).to_csv(os.path.join(data_dir, 'index_data.csv'), index=False)
-    
-    # --- Part 2: Stock Screener Computation ---
-    all_results = []
-    for country_code in countries.keys():
+def loadings_stage(anchors, resamples, block_length, confidence, seed, workers=None):
+    # Block-bootstrap intervals of each country's loadings, keyed by the same driver names as index_data
+    schema = FeatureSchema.load('featured_dataset')
+    frames = {country_code: load_frame('featured_dataset', columns=schema.columns(country_code)) for country_code in anchors}
+    intervals, explained = bootstrap.bootstrap_countries(frames, anchors, resamples, block_length, confidence, seed, workers)
+    intervals['driver_name'] = intervals['feature'].map(clean_feature_name)
+    save_frame(intervals, 'loading_intervals')
+    save_frame(explained, 'explained_variance')
+
+def returns_stage(start_date, end_date, tickers, min_rows, store=None, provider=None):
+    histories, reports = fetch_stock_universe(tickers, start_date, end_date, store or PriceStore(), provider, min_rows=min_rows)
+    save_frame(stock_returns(histories), 'stock_returns')
+    save_frame(pd.DataFrame({'ticker': list(reports), 'report': list(reports.values())}), 'stock_fetch_report')
+
+def screen_stage(threshold, min_points, windows):
+    full_index_history = load_frame('full_stability_index').rename_axis('date').reset_index()
+    index_changes = {}
+    for country_code in REGISTRY.codes:
         country_index_df = full_index_history[['date', country_code]].rename(columns={country_code: 'stability_index'})
-        prepared_index_df = prepare_index_data(country_index_df)
-        country_results = process_stocks_for_country(country_code, prepared_index_df, start_date, end_date)
-        all_results.extend(country_results)
-    
-    # Add this line to ensure all stocks are included in the yfinance call
-    all_stock_tickers = [ticker for stock_list in STOCK_UNIVERSE.values() for ticker, name in stock_list]
-    all_tickers.extend(all_stock_tickers)
-    tickers = list(set(all_tickers))
-        
+        index_changes[country_code] = prepare_index_data(country_index_df).set_index('date')['index_change']
+    index_changes = pd.DataFrame(index_changes)
+    returns = load_frame('stock_returns')
+    reports = load_frame('stock_fetch_report')
+    reports = dict(zip(reports['ticker'], reports['report']))
+    stats = categorize_stocks(calculate_stock_correlations(returns, index_changes), threshold, min_points)
+
+    # Time-varying view: date x ticker correlation panels the dashboard can read per date
+    rolling_correlations, _, regime_changes = rolling_screener(returns, index_changes, STOCK_COUNTRY, windows, threshold)
+    save_frame(rolling_correlations, 'rolling_correlation')
+    save_frame(regime_changes, 'regime_changes')
+
+    all_results = []
+    for country_code in REGISTRY.codes:
+        all_results.extend(process_stocks_for_country(country_code, stats, reports, min_points))
     save_stock_screener_data(all_results)
-    print("Backend pre-computation complete.")
+
+def news_stage(start_date, end_date, countries, backend=None):
+    store = gdelt.ToneStore()
+    store.refresh(countries, end_date, backend or gdelt.BigQueryBackend(), start_date)
+    save_frame(gdelt.tone_features(store.daily(list(countries), start_date, end_date), REGISTRY), 'news_tone')
+
+def headlines_stage(path, version=None):
+    # version (mtime, size) only keys the cache, so a rewritten export reruns the stage
+    save_frame(sentiment.load_headlines(path), 'news_headlines')
+
+def sentiment_stage(batch_size, scorer_name=None, scorer=None, workers=None):
+    # scorer_name only keys the cache; the scorer object itself is bound into the stage
+    features = sentiment.sentiment_features(load_frame('news_headlines'), scorer, batch_size, workers, registry=REGISTRY)
+    save_frame(features, 'news_sentiment')
+
+def pipeline_stages(start_date=None, end_date=None, provider=None, refit=False, workers=None, executor='process', news_backend=None, sentiment_scorer=None, headlines=None):
+    """
+    The backend DAG: fetch -> features -> index and returns (sharing fetch's price store),
+    joined by the screener and the walk-forward backtest.
+    Date range, tickers, windows and thresholds are hashed into each stage's cache key.
+    """
+    start_date = start_date or REGISTRY.history_start
+    end_date = end_date or pd.Timestamp.today().strftime('%Y-%m-%d')
+    # fetch and returns share one price store; its lock serializes their refreshes
+    store = PriceStore()
+    # News aggregates join the features when this run produces them or an earlier one did
+    has_headlines = headlines is not None or os.path.exists(artifact_path('news_headlines'))
+    produced = {'news_tone': news_backend is not None, 'news_sentiment': has_headlines}
+    news = [name for name, will_run in produced.items() if will_run or os.path.exists(artifact_path(name))]
+    stages = [
+        Stage('fetch', partial(fetch_stage, store=store, provider=provider),
+              outputs=['unified_dataset'],
+              params={'start_date': start_date, 'end_date': end_date, 'tickers': REGISTRY.all_tickers(), 'country_codes': REGISTRY.codes, 'indicators': REGISTRY.indicators, 'release_lags': REGISTRY.release_lags}),
+        Stage('features', features_stage,
+              inputs=['unified_dataset', *news], outputs=['featured_dataset', 'featured_dataset_schema'],
+              params={'windows': VOLATILITY_WINDOWS, 'dtype': PANEL_DTYPE, 'news': news}),
+        Stage('index', partial(index_stage, refit=refit, workers=workers, executor=executor),
+              inputs=['featured_dataset', 'featured_dataset_schema'], outputs=['full_stability_index', 'index_data'],
+              params={'anchors': {country.code: country.index for country in REGISTRY.countries}}),
+        Stage('loadings', partial(loadings_stage, workers=workers),
+              inputs=['featured_dataset', 'featured_dataset_schema'], outputs=['loading_intervals', 'explained_variance'],
+              params={'anchors': {country.code: country.index for country in REGISTRY.countries}, 'resamples': bootstrap.RESAMPLES,
+                      'block_length': bootstrap.BLOCK_LENGTH, 'confidence': bootstrap.CONFIDENCE, 'seed': 0}),
+        Stage('returns', partial(returns_stage, store=store, provider=provider),
+              outputs=['stock_returns', 'stock_fetch_report'],
+              params={'start_date': start_date, 'end_date': end_date, 'tickers': REGISTRY.stock_tickers, 'min_rows': MIN_DATA_POINTS}),
+        Stage('screen', screen_stage,
+              inputs=['full_stability_index', 'stock_returns', 'stock_fetch_report'],
+              outputs=['rolling_correlation', 'regime_changes', 'stock_screener_data'],
+              params={'threshold': SCREENER_THRESHOLD, 'min_points': MIN_DATA_POINTS, 'windows': ROLLING_WINDOWS}),
+        Stage('backtest', backtest.main,
+              inputs=['featured_dataset', 'featured_dataset_schema', 'unified_dataset', 'stock_returns'],
+              outputs=['outlook_backtest', 'screener_backtest'],
+              params={'outlook_grid': backtest.OUTLOOK_GRID, 'screener_grid': backtest.SCREENER_GRID, 'horizons': backtest.HORIZONS,
+                      'anchors': {country.code: country.index for country in REGISTRY.countries}, 'burn_in': backtest.BURN_IN}),
+    ]
+    # GDELT news tone needs a query backend (BigQuery credentials or a local SQLite table)
+    if news_backend is not None:
+        stages.append(Stage('news', partial(news_stage, backend=news_backend), outputs=['news_tone'],
+                            params={'start_date': start_date, 'end_date': end_date, 'countries': {country.code: country.fips for country in REGISTRY.countries}}))
+    # Headlines (date, country, text) are imported from a news feed export, or left by an earlier import
+    if headlines is not None:
+        stat = os.stat(headlines)
+        stages.append(Stage('headlines', headlines_stage, outputs=['news_headlines'],
+                            params={'path': os.path.abspath(headlines), 'version': [stat.st_mtime_ns, stat.st_size]}))
+    if has_headlines:
+        stages.append(Stage('sentiment', partial(sentiment_stage, scorer=sentiment_scorer, workers=workers),
+                            inputs=['news_headlines'], outputs=['news_sentiment'],
+                            params={'scorer_name': (sentiment_scorer or sentiment.LexiconScorer()).name, 'batch_size': sentiment.BATCH_SIZE}))
+    return stages
+
+def main(provider=None, refit=False, workers=None, executor='process', force=(), news_backend=None, sentiment_scorer=None, headlines=None):
+    """
+    Runs the backend pipeline, recomputing only the stages whose inputs or parameters changed.
+    A refit always reruns the index stage (and whatever its new output invalidates).
+    """
+    force = set(force) | ({'index'} if refit else set())
+    # Stages share the artifacts they read within this run
+    enable_profiling()
+    enable_table_cache()
+    status = run_pipeline(pipeline_stages(provider=provider, refit=refit, workers=workers, executor=executor, news_backend=news_backend, sentiment_scorer=sentiment_scorer, headlines=headlines), force=force)
+    print(f"Backend pre-computation complete ({sum(state == 'ran' for state in status.values())}/{len(status)} stages ran).")
 
 if __name__ == "__main__":
     main()
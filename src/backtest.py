@@ -0,0 +1,213 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from correlation import rolling_correlation
+from incremental_index import IncrementalIndex
+from panel import ffill_trimmed
+from profiling import traced
+from registry import load_registry
+from schema import FeatureSchema
+from storage import load_frame, save_frame
+
+# Walk-forward backtest of the outlook signal and the screener categories. On every
+# historical date both are recomputed from data up to and including that date
+# (rolling windows that end on it) and scored against returns over the following
+# `horizon` trading days. The whole parameter grid is evaluated at once on
+# (parameters x dates x series) NumPy arrays; there is no per-date Python loop.
+# The index itself is rebuilt walk-forward as well: fitted on a burn-in period and
+# then updated one day at a time, so no index value depends on later data (the
+# published index starts with a full-sample fit and cannot be used for this).
+
+OUTLOOK_GRID = {
+    'short_window': (5, 7, 10),
+    'long_window': (14, 21, 30),
+    'cautious_ratio': (1.25, 1.5, 2.0),
+    'bullish_ratio': (0.5, 0.75, 0.9),
+}
+SCREENER_GRID = {
+    'window': (30, 60, 90),
+    'threshold': (0.01, 0.02, 0.05),
+}
+HORIZONS = (5, 21)
+BURN_IN = 252
+
+OUTLOOKS = {1: 'Bullish', 0: 'Neutral', -1: 'Cautious'}
+CATEGORIES = {1: 'High-Momentum Play', 0: 'Neutral', -1: 'Resilient Defender'}
+
+
+def forward_returns(prices, horizon):
+    """
+    Return from the close of each date to the close `horizon` rows later (NaN at the end).
+    """
+    prices = np.asarray(prices, dtype=float)
+    forward = np.full(prices.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        forward[:-horizon] = prices[horizon:] / prices[:-horizon] - 1
+    return forward
+
+
+def _score(signal, forward, labels, keys):
+    """
+    Observations, mean forward return and hit rate per parameter combination and label.
+    `signal` is (combinations x dates x series) with -2 for "no signal", `forward` is
+    (dates x series). One bincount pass over (combination, label) buckets.
+    """
+    combinations = signal.shape[0]
+    scorable = (signal != -2) & np.isfinite(forward)[None]
+    buckets = (np.arange(combinations)[:, None, None] * 4 + signal.astype(np.int64) + 2)[scorable]
+    values = np.broadcast_to(forward, signal.shape)[scorable]
+    size = combinations * 4
+    count = np.bincount(buckets, minlength=size).reshape(combinations, 4)
+    total = np.bincount(buckets, weights=values, minlength=size).reshape(combinations, 4)
+    hits = np.bincount(buckets, weights=values > 0, minlength=size).reshape(combinations, 4)
+    rows = []
+    for code, label in labels.items():
+        column = code + 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rows.append(pd.DataFrame({
+                'label': label,
+                'observations': count[:, column],
+                'mean_forward_return': total[:, column] / count[:, column],
+                'hit_rate': hits[:, column] / count[:, column],
+            }, index=keys))
+    return pd.concat(rows)
+
+
+@traced('backtest.index')
+def walk_forward_index(country_frames, anchors=None, burn_in=BURN_IN):
+    """
+    Dates x countries index in which each day's value uses only data up to that day:
+    the engine is fitted on the first `burn_in` complete rows (left out of the result)
+    and every later row is folded in with IncrementalIndex.update.
+    """
+    anchors = anchors or {}
+    columns = {}
+    for country_code, frame in country_frames.items():
+        clean = ffill_trimmed(frame)
+        if len(clean) <= burn_in:
+            print(f"Skipping {country_code}: {len(clean)} complete rows, burn-in needs more than {burn_in}")
+            continue
+        engine, _ = IncrementalIndex.fit(clean.iloc[:burn_in], anchors.get(country_code))
+        columns[country_code] = engine.update(clean.iloc[burn_in:])
+    return pd.DataFrame(columns)
+
+
+@traced('backtest.outlook')
+def backtest_outlook(stability_index, prices, grid=None, horizons=HORIZONS):
+    """
+    Outlook (Bullish/Neutral/Cautious) of every country on every date for each grid point,
+    scored by the forward return of the country's market index. `stability_index` and
+    `prices` are dates x countries frames on the same calendar.
+    """
+    grid = {**OUTLOOK_GRID, **(grid or {})}
+    dates = stability_index.index.intersection(prices.index)
+    countries = [code for code in stability_index.columns if code in prices.columns]
+    changes = stability_index.loc[dates, countries].pct_change().replace([np.inf, -np.inf], np.nan)
+    levels = prices.loc[dates, countries].to_numpy(dtype=float)
+
+    # One rolling pass per distinct window over all countries at once
+    windows = sorted(set(grid['short_window']) | set(grid['long_window']))
+    vol = {window: changes.rolling(window=window).std().to_numpy() for window in windows}
+    pairs = [(short, long) for short in grid['short_window'] for long in grid['long_window'] if short < long]
+    cautious = np.asarray(grid['cautious_ratio'], dtype=float)
+    bullish = np.asarray(grid['bullish_ratio'], dtype=float)
+
+    # (pairs x cautious x bullish x dates x countries), same rules as model.calculate_outlook
+    short_vol = np.stack([vol[short] for short, _ in pairs])[:, None, None]
+    long_vol = np.stack([vol[long] for _, long in pairs])[:, None, None]
+    is_cautious = short_vol > long_vol * cautious[None, :, None, None, None]
+    is_bullish = short_vol < long_vol * bullish[None, None, :, None, None]
+    signal = np.where(is_cautious, -1, np.where(is_bullish, 1, 0)).astype(np.int8)
+    signal[np.broadcast_to(~(np.isfinite(short_vol) & np.isfinite(long_vol)), signal.shape)] = -2
+    signal = signal.reshape(-1, len(dates), len(countries))
+
+    keys = pd.MultiIndex.from_tuples(
+        [(short, long, c, b) for (short, long), c, b in itertools.product(pairs, cautious, bullish)],
+        names=['short_window', 'long_window', 'cautious_ratio', 'bullish_ratio'],
+    )
+    results = []
+    for horizon in horizons:
+        scores = _score(signal, forward_returns(levels, horizon), OUTLOOKS, keys)
+        scores.insert(0, 'horizon', horizon)
+        results.append(scores)
+    return _with_spread(pd.concat(results).reset_index(), 'Bullish', 'Cautious', keys.names)
+
+
+@traced('backtest.screener')
+def backtest_screener(returns, index_changes, country_of, prices=None, grid=None, horizons=HORIZONS):
+    """
+    Screener category of every stock on every date for each (window, threshold), scored
+    by the stock's forward return and, when the country index `prices` are given, its
+    return in excess of its country index over the same horizon.
+    """
+    grid = {**SCREENER_GRID, **(grid or {})}
+    thresholds = np.asarray(grid['threshold'], dtype=float)
+    panels = {window: rolling_correlation(returns, index_changes, country_of, window) for window in grid['window']}
+    dates, tickers = panels[grid['window'][0]].index, panels[grid['window'][0]].columns
+
+    # (windows x thresholds x dates x tickers)
+    corr = np.stack([panels[window].to_numpy() for window in grid['window']])[:, None]
+    signal = np.where(corr > thresholds[None, :, None, None], 1, np.where(corr < -thresholds[None, :, None, None], -1, 0)).astype(np.int8)
+    signal[np.broadcast_to(~np.isfinite(corr), signal.shape)] = -2
+    signal = signal.reshape(-1, len(dates), len(tickers))
+    keys = pd.MultiIndex.from_product([grid['window'], thresholds], names=['window', 'threshold'])
+
+    # Compounded closes rebuilt from returns (gaps count as flat days)
+    growth = np.nan_to_num(returns.loc[dates, tickers].to_numpy(dtype=float), nan=0.0, posinf=0.0, neginf=0.0)
+    stock_levels = np.cumprod(1 + growth, axis=0)
+    index_levels = None
+    if prices is not None:
+        index_levels = prices.reindex(dates).ffill()[[country_of[ticker] for ticker in tickers]].to_numpy(dtype=float)
+
+    results = []
+    for horizon in horizons:
+        forward = forward_returns(stock_levels, horizon)
+        scores = _score(signal, forward, CATEGORIES, keys)
+        if index_levels is not None:
+            excess = _score(signal, forward - forward_returns(index_levels, horizon), CATEGORIES, keys)
+            scores['mean_excess_return'] = excess['mean_forward_return'].to_numpy()
+        scores.insert(0, 'horizon', horizon)
+        results.append(scores)
+    return _with_spread(pd.concat(results).reset_index(), 'High-Momentum Play', 'Resilient Defender', keys.names)
+
+
+def _with_spread(scores, long_label, short_label, names):
+    # Mean forward return of the favourable label minus the unfavourable one per grid point
+    means = scores.set_index(list(names) + ['horizon', 'label'])['mean_forward_return'].unstack('label')
+    spread = (means[long_label] - means[short_label]).rename('spread').reset_index()
+    return scores.merge(spread, on=list(names) + ['horizon'], how='left')
+
+
+def main(outlook_grid=None, screener_grid=None, horizons=HORIZONS, anchors=None, burn_in=BURN_IN):
+    """
+    Backtests the outlook grid and screener grid on a walk-forward index built from the
+    featured dataset and saves 'outlook_backtest' and 'screener_backtest'.
+    """
+    registry = load_registry()
+    anchors = anchors or {country.code: country.index for country in registry.countries}
+    schema = FeatureSchema.load('featured_dataset')
+    frames = {code: load_frame('featured_dataset', columns=schema.columns(code)) for code in anchors}
+    stability_index = walk_forward_index(frames, anchors, burn_in)
+    index_prices = load_frame('unified_dataset', columns=registry.index_tickers)
+    index_prices.columns = [country.code for country in registry.countries]
+    index_prices = index_prices.reindex(stability_index.index).ffill()
+
+    outlook = backtest_outlook(stability_index, index_prices, outlook_grid, horizons)
+    save_frame(outlook, 'outlook_backtest')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        index_changes = stability_index.pct_change()
+    screener = backtest_screener(load_frame('stock_returns'), index_changes, registry.stock_country, index_prices, screener_grid, horizons)
+    save_frame(screener, 'screener_backtest')
+
+    best = outlook[outlook['label'] == 'Bullish'].sort_values('spread', ascending=False).head(5)
+    print("Top outlook parameters by Bullish - Cautious forward return spread:")
+    print(best.to_string(index=False))
+    print("Screener spread (High-Momentum - Resilient Defender) by window/threshold:")
+    print(screener[screener['label'] == 'Neutral'][['window', 'threshold', 'horizon', 'spread']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from incremental_index import IncrementalIndex
+from panel import ffill_trimmed
+from profiling import traced
+
+# Sampling uncertainty of the first-component loadings. Each country's clean
+# feature history is resampled with a moving-block bootstrap (blocks keep the
+# serial dependence of daily data), every resample is re-standardized and its
+# first component taken from one batched eigendecomposition, and signs are
+# aligned with the full-sample component before percentile intervals are formed.
+# Resamples are split into chunks that run on a process pool.
+
+RESAMPLES = 2000
+BLOCK_LENGTH = 20
+CONFIDENCE = 0.95
+CHUNK_SIZE = 250
+
+
+def block_indices(n_rows, block_length, resamples, rng):
+    """
+    Row indices of `resamples` moving-block bootstrap samples of an n_rows series.
+    """
+    block_length = max(1, min(block_length, n_rows))
+    blocks = -(-n_rows // block_length)
+    starts = rng.integers(0, n_rows - block_length + 1, size=(resamples, blocks))
+    return (starts[:, :, None] + np.arange(block_length)).reshape(resamples, -1)[:, :n_rows]
+
+
+def first_components(samples):
+    """
+    First principal component and explained-variance ratio of each standardized sample
+    in a (resamples x rows x features) stack.
+    """
+    centered = samples - samples.mean(axis=1, keepdims=True)
+    scale = np.sqrt((centered ** 2).mean(axis=1, keepdims=True))
+    scaled = centered / np.where(scale > 0, scale, 1.0)
+    corr = scaled.transpose(0, 2, 1) @ scaled / samples.shape[1]
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    return eigenvectors[:, :, -1], eigenvalues[:, -1] / eigenvalues.sum(axis=1)
+
+
+def _bootstrap_chunk(values, reference, block_length, resamples, seed):
+    # Worker: one chunk of resamples, signs aligned with the full-sample component
+    rng = np.random.default_rng(seed)
+    components, ratios = first_components(values[block_indices(len(values), block_length, resamples, rng)])
+    components *= np.where(components @ reference < 0, -1.0, 1.0)[:, None]
+    return components, ratios
+
+
+@traced('bootstrap')
+def bootstrap_country(country_df, anchor=None, resamples=RESAMPLES, block_length=BLOCK_LENGTH, confidence=CONFIDENCE, seed=0, pool=None):
+    """
+    Loading intervals and explained-variance interval of one country's first component.
+    Returns (intervals: one row per feature, explained: one-row summary).
+    """
+    clean = ffill_trimmed(country_df)
+    engine, _ = IncrementalIndex.fit(clean, anchor)
+    reference = engine.loadings.to_numpy()
+    values = clean.to_numpy(dtype=float)
+    _, full_ratio = first_components(values[None])
+
+    chunks = [min(CHUNK_SIZE, resamples - start) for start in range(0, resamples, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(values, reference, block_length, size, child) for size, child in zip(chunks, seeds)]
+    if pool is None:
+        parts = [_bootstrap_chunk(*arg) for arg in args]
+    else:
+        parts = [future.result() for future in [pool.submit(_bootstrap_chunk, *arg) for arg in args]]
+    components = np.concatenate([part[0] for part in parts])
+    ratios = np.concatenate([part[1] for part in parts])
+
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(components, [tail, 100 - tail], axis=0)
+    intervals = pd.DataFrame({
+        'feature': [str(column) for column in clean.columns],
+        'loading': reference,
+        'lower': lower,
+        'upper': upper,
+        'std': components.std(axis=0, ddof=1),
+    })
+    ratio_lower, ratio_upper = np.percentile(ratios, [tail, 100 - tail])
+    explained = pd.DataFrame({'explained_variance': [full_ratio[0]], 'lower': [ratio_lower], 'upper': [ratio_upper], 'resamples': [resamples], 'rows': [len(values)]})
+    return intervals, explained
+
+
+def bootstrap_countries(country_frames, anchors=None, resamples=RESAMPLES, block_length=BLOCK_LENGTH, confidence=CONFIDENCE, seed=0, workers=None):
+    """
+    Bootstraps every country ({code: feature frame}) on one shared process pool
+    (workers=1 runs in-process). Returns long (intervals, explained) frames keyed by country.
+    """
+    anchors = anchors or {}
+    results = {}
+    if workers == 1:
+        for code, frame in country_frames.items():
+            results[code] = bootstrap_country(frame, anchors.get(code), resamples, block_length, confidence, seed)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for code, frame in country_frames.items():
+                results[code] = bootstrap_country(frame, anchors.get(code), resamples, block_length, confidence, seed, pool)
+
+    intervals = pd.concat([result[0].assign(country_code=code) for code, result in results.items()], ignore_index=True)
+    explained = pd.concat([result[1].assign(country_code=code) for code, result in results.items()], ignore_index=True)
+    return intervals, explained
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from profiling import traced
+
+# Whole-universe correlation engine: one aligned (dates x tickers) returns matrix
+# against the (dates x countries) index-change matrix, NaN-aware and pairwise.
+
+# Correlation beyond which a stock is labelled momentum (+) or defensive (-)
+SCREENER_THRESHOLD = 0.02
+
+
+def returns_matrix(closes):
+    """
+    Daily returns of a wide close frame, each ticker measured from its own previous
+    traded day so calendar gaps in one market don't blank out another's returns.
+    """
+    previous = closes.ffill().shift(1)
+    return (closes / previous - 1).where(closes.notna())
+
+
+def correlation_matrix(returns, index_changes):
+    """
+    Pairwise-complete Pearson correlation of every ticker against every country
+    index, computed with five matrix products instead of one merge per pair.
+    Returns (correlations, counts) as tickers x countries frames.
+    """
+    dates = returns.index.intersection(index_changes.index)
+    y = returns.loc[dates].to_numpy(dtype=float)
+    x = index_changes.loc[dates].to_numpy(dtype=float)
+    my, mx = np.isfinite(y).astype(float), np.isfinite(x).astype(float)
+    y0, x0 = np.nan_to_num(y), np.nan_to_num(x)
+
+    n = my.T @ mx
+    sum_x, sum_y = my.T @ x0, y0.T @ mx
+    sum_xx, sum_yy = my.T @ (x0 * x0), (y0 * y0).T @ mx
+    sum_xy = y0.T @ x0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = sum_yy - sum_y ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+
+    correlations = pd.DataFrame(corr, index=returns.columns, columns=index_changes.columns)
+    counts = pd.DataFrame(n.astype(int), index=returns.columns, columns=index_changes.columns)
+    return correlations, counts
+
+
+@traced('correlation')
+def correlate_universe(returns, index_changes, country_of, window=30):
+    """
+    Correlation of each ticker with its own country's index change, plus the mean and
+    std of its last `window` aligned returns. Returns one row per ticker.
+    """
+    tickers = [ticker for ticker in returns.columns if country_of.get(ticker) in index_changes.columns]
+    returns = returns[tickers]
+    correlations, counts = correlation_matrix(returns, index_changes)
+    countries = [country_of[ticker] for ticker in tickers]
+
+    # Gather each ticker's own country column so the tail statistics see the same
+    # aligned rows as the correlation
+    dates = returns.index.intersection(index_changes.index)
+    y = returns.loc[dates].to_numpy(dtype=float)
+    x = index_changes.loc[dates, countries].to_numpy(dtype=float)
+    aligned = np.isfinite(y) & np.isfinite(x)
+    remaining = aligned[::-1].cumsum(axis=0)[::-1]
+    tail = aligned & (remaining <= window)
+
+    n_tail = tail.sum(axis=0)
+    y_tail = np.where(tail, y, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = y_tail.sum(axis=0) / n_tail
+        std = np.sqrt((np.where(tail, y - mean, 0.0) ** 2).sum(axis=0) / (n_tail - 1))
+
+    column = {country: i for i, country in enumerate(index_changes.columns)}
+    picks = [column[country] for country in countries]
+    rows = np.arange(len(tickers))
+    return pd.DataFrame({
+        'country': countries,
+        'correlation': correlations.to_numpy()[rows, picks],
+        'data_points': counts.to_numpy()[rows, picks],
+        'mean_return': mean,
+        'std_return': std,
+    }, index=pd.Index(tickers, name='ticker'))
+
+
+def categorize(correlations, threshold=SCREENER_THRESHOLD):
+    """
+    Labels correlations above +threshold as momentum and below -threshold as defensive.
+    """
+    correlations = np.asarray(correlations, dtype=float)
+    return np.select([correlations > threshold, correlations < -threshold], ["High-Momentum Play", "Resilient Defender"], default=None)
+
+
+def rolling_correlation(returns, index_changes, country_of, window, min_periods=None):
+    """
+    Rolling correlation of each ticker with its country's index change over the last
+    `window` dates. Window sums come from prefix sums, so each step costs O(1) per
+    ticker regardless of window length. Returns a dates x tickers panel.
+    """
+    min_periods = min_periods or window // 2
+    tickers = [ticker for ticker in returns.columns if country_of.get(ticker) in index_changes.columns]
+    dates = returns.index.intersection(index_changes.index)
+    y = returns.loc[dates, tickers].to_numpy(dtype=float)
+    x = index_changes.loc[dates, [country_of[ticker] for ticker in tickers]].to_numpy(dtype=float)
+    aligned = np.isfinite(x) & np.isfinite(y)
+    x, y = np.where(aligned, x, 0.0), np.where(aligned, y, 0.0)
+
+    def window_sum(values):
+        prefix = np.vstack([np.zeros((1, values.shape[1])), values.cumsum(axis=0)])
+        return prefix[window:] - prefix[:-window] if len(values) >= window else np.empty((0, values.shape[1]))
+
+    n = window_sum(aligned.astype(float))
+    sum_x, sum_y = window_sum(x), window_sum(y)
+    sum_xx, sum_yy, sum_xy = window_sum(x * x), window_sum(y * y), window_sum(x * y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = sum_yy - sum_y ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < min_periods) | (var_x <= 0) | (var_y <= 0)] = np.nan
+
+    panel = np.full((len(dates), len(tickers)), np.nan)
+    panel[window - 1:] = corr
+    return pd.DataFrame(panel, index=dates, columns=tickers)
+
+
+@traced('correlation.rolling')
+def rolling_screener(returns, index_changes, country_of, windows=(30, 60, 90), threshold=SCREENER_THRESHOLD):
+    """
+    Rolling correlation panels for several windows with their category per date and a
+    flag on dates where a ticker's category differs from the previous date's, Neutral
+    included. Columns are (window, country, ticker).
+    """
+    panels = {window: rolling_correlation(returns, index_changes, country_of, window) for window in windows}
+    correlations = pd.concat(panels, axis=1)
+    correlations.columns = pd.MultiIndex.from_tuples([(window, country_of[ticker], ticker) for window, ticker in correlations.columns])
+    values = correlations.to_numpy()
+    labels = categorize(values, threshold)
+    # Neutral is a regime of its own; only dates without a correlation stay unlabelled
+    labels[np.isfinite(values) & pd.isna(labels)] = 'Neutral'
+    categories = pd.DataFrame(labels, index=correlations.index, columns=correlations.columns)
+    previous = categories.shift(1)
+    regime_changes = categories.notna() & previous.notna() & (categories != previous)
+    return correlations, categories, regime_changes
@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import os
+
+from correlation import SCREENER_THRESHOLD, categorize
+from dashboard_data import category_since, country_history, get_frame, loading_uncertainty, rolling_panel_columns, sector_cumulative_returns
+from registry import load_registry
 
 def main():
     """
@@ -12,36 +15,22 @@ def main():
 
     # Load pre-computed data
     try:
-        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-        index_data = pd.read_csv(os.path.join(data_dir, 'index_data.csv'))
-        stock_screener_data = pd.read_csv(os.path.join(data_dir, 'stock_screener_data.csv'))
-        full_stability_index = pd.read_csv(os.path.join(data_dir, 'full_stability_index.csv'), index_col=0, parse_dates=True)
-        featured_data = pd.read_csv(os.path.join(data_dir, 'featured_dataset.csv'), index_col=0, parse_dates=True)
+        index_data = get_frame('index_data')
+        stock_screener_data = get_frame('stock_screener_data')
     except FileNotFoundError:
         st.error("Data files not found. Please run the backend script to generate the data.")
         return
 
     # Country selection
-    countries = ["Brazil", "India", "South Africa", "Poland"]
-    country_map = {
-        "Brazil": "BRA",
-        "India": "IND",
-        "South Africa": "ZAF",
-        "Poland": "POL"
-    }
-    stock_lists = {
-        "BRA": ["VALE", "PETR4.SA", "ITUB", "BBDC4.SA", "ABEV3.SA"],
-        "IND": ["RELIANCE.NS", "TCS.NS", "HDB", "INFY", "HINDUNILVR.NS"],
-        "ZAF": ["NPN.JO", "BHP", "CFR.JO", "ANH.JO", "FSR.JO"],
-        "POL": ["PKO.WA", "PZU.WA", "CDR.WA", "LPP.WA", "DNP.WA"]
-    }
+    registry = load_registry()
+    countries = [country.name for country in registry.countries]
     selected_country_name = st.sidebar.selectbox("Select a country", countries)
-    selected_country_code = country_map[selected_country_name]
+    selected_country_code = registry.by_name[selected_country_name].code
 
     # Filter data for the selected country
     country_index_data = index_data[index_data['country_code'] == selected_country_code].iloc[0]
     country_screener_data = stock_screener_data[stock_screener_data['country'] == selected_country_code]
-    country_stability_history = full_stability_index[[selected_country_code]]
+    country_stability_history = country_history(selected_country_code)
 
 
     # --- Summary Metrics ---
@@ -81,29 +70,61 @@ def main():
         country_index_data['negative_driver_3_name']: country_index_data['negative_driver_3_value']
     }
 
+    # Bootstrap 95% intervals, when the loadings stage has produced them
+    bounds, explained = loading_uncertainty(selected_country_code)
+
+    def driver_line(name, value):
+        if name in bounds:
+            # The interval belongs to the full-sample fit, so show that loading with it
+            reference, lower, upper = bounds[name]
+            return f"- **{name}:** `{value:.4f}` (full-sample fit `{reference:.4f}`, 95% CI `{lower:.4f}` to `{upper:.4f}`)"
+        return f"- **{name}:** `{value:.4f}`"
+
     col1, col2 = st.columns(2)
     with col1:
         st.success("Positive Drivers")
         for name, value in positive_drivers.items():
-            st.markdown(f"- **{name}:** `{value:.4f}`")
+            st.markdown(driver_line(name, value))
     with col2:
         st.warning("Negative Drivers")
         for name, value in negative_drivers.items():
-            st.markdown(f"- **{name}:** `{value:.4f}`")
+            st.markdown(driver_line(name, value))
+    if explained is not None:
+        st.caption(f"First component explains {explained['explained_variance']:.1%} of the variance "
+                   f"(95% CI {explained['lower']:.1%} to {explained['upper']:.1%}, {int(explained['resamples'])} block-bootstrap resamples).")
 
     # --- Sector Performance ---
     st.header("Sector Performance (Cumulative Returns)")
-    sector_tickers = stock_lists[selected_country_code]
-    sector_data = featured_data[sector_tickers]
-    sector_data.index = pd.to_datetime(sector_data.index, errors='coerce', format='%Y-%m-%d %H:%M:%S') # Ensure index is DatetimeIndex
-    daily_returns = 1 + sector_data.pct_change()
-    monthly_returns = daily_returns.resample('ME').prod()
-    cumulative_monthly_returns = monthly_returns.cumprod() - 1
-    st.line_chart(cumulative_monthly_returns.dropna())
+    st.line_chart(sector_cumulative_returns(selected_country_code))
 
 
     # --- Stability-Adjusted Stock Screener ---
     st.header("Stability-Adjusted Stock Screener")
+
+    # Categories on any historical date come from the rolling correlation panel
+    panel_columns = rolling_panel_columns(selected_country_code)
+    if panel_columns:
+        window = st.selectbox("Correlation window (days)", list(panel_columns))
+        rolling = get_frame('rolling_correlation', panel_columns[window]).dropna(how='all')
+        as_of = st.select_slider("Screener date", options=list(rolling.index.date), value=rolling.index[-1].date())
+        snapshot = rolling.loc[pd.Timestamp(as_of)].dropna()
+        company_names = registry.company_names
+        tickers = [col[2] for col in snapshot.index]
+        country_screener_data = pd.DataFrame({
+            'ticker': tickers,
+            'company_name': [company_names.get(ticker, ticker) for ticker in tickers],
+            'correlation_to_index': snapshot.values.round(3),
+            'category': categorize(snapshot.values, SCREENER_THRESHOLD),
+        })
+        country_screener_data['category'] = country_screener_data['category'].fillna('Neutral')
+        # When each stock entered its current category (regime_changes of the screen stage)
+        since = category_since(list(snapshot.index), pd.Timestamp(as_of))
+        if since is not None:
+            country_screener_data['category_since'] = pd.to_datetime(since.to_numpy()).date
+            changed = country_screener_data[since.to_numpy() == pd.Timestamp(as_of)]
+            if len(changed):
+                st.info(f"Changed category on {as_of}: " + ", ".join(f"{ticker} → {category}" for ticker, category in zip(changed['ticker'], changed['category'])))
+        country_screener_data = country_screener_data.sort_values('correlation_to_index', ascending=False)
     
     if not country_screener_data.empty:
         high_momentum = country_screener_data[country_screener_data['category'] == 'High-Momentum Play']
@@ -111,13 +132,14 @@ def main():
         neutral = country_screener_data[country_screener_data['category'] == 'Neutral']
 
         tab1, tab2, tab3 = st.tabs(["High-Momentum Play", "Resilient Defender", "Neutral"])
+        shown = [col for col in ('ticker', 'company_name', 'correlation_to_index', 'category_since') if col in country_screener_data]
 
         with tab1:
-            st.dataframe(high_momentum[['ticker', 'company_name', 'correlation_to_index']])
+            st.dataframe(high_momentum[shown])
         with tab2:
-            st.dataframe(resilient_plays[['ticker', 'company_name', 'correlation_to_index']])
+            st.dataframe(resilient_plays[shown])
         with tab3:
-            st.dataframe(neutral[['ticker', 'company_name', 'correlation_to_index']])
+            st.dataframe(neutral[shown])
     else:
         st.warning("No stock screener data available for the selected country.")
 
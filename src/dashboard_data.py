@@ -0,0 +1,110 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from features import cumulative_monthly_returns
+from registry import load_registry
+from storage import DATA_DIR, artifact_path, load_frame, read_columns
+
+# Data access for the Streamlit dashboard. Every artifact is cached under its file
+# version (mtime + size), so reruns triggered by widget changes reuse parsed frames
+# and a backend rewrite invalidates them automatically. Country-specific reads only
+# project that country's columns.
+
+
+def artifact_version(name):
+    """
+    Identifies the on-disk version of an artifact (Parquet, or the legacy CSV).
+    """
+    for path in (artifact_path(name), os.path.join(DATA_DIR, f'{name}.csv')):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            return path, stat.st_mtime_ns, stat.st_size
+    raise FileNotFoundError(f"No artifact named '{name}' in {DATA_DIR}")
+
+
+def _with_datetime_index(df):
+    index = pd.to_datetime(df.index, errors='coerce', format='mixed')
+    return df.set_axis(index)[index.notna()]
+
+
+@st.cache_data(show_spinner=False)
+def _cached_frame(name, version, columns):
+    return load_frame(name, columns=list(columns) if columns is not None else None)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_columns(name, version):
+    return read_columns(name)
+
+
+def get_frame(name, columns=None):
+    """
+    Loads an artifact (optionally a column projection) through the version-keyed cache.
+    """
+    return _cached_frame(name, artifact_version(name), tuple(columns) if columns is not None else None)
+
+
+def get_columns(name):
+    return _cached_columns(name, artifact_version(name))
+
+
+def country_history(country_code):
+    return _with_datetime_index(get_frame('full_stability_index', [country_code]))
+
+
+@st.cache_data(show_spinner=False)
+def _cached_sector_returns(country_code, version):
+    tickers = [ticker for ticker in load_registry().dashboard_stocks[country_code] if ticker in read_columns('featured_dataset')]
+    return cumulative_monthly_returns(_with_datetime_index(load_frame('featured_dataset', columns=tickers)))
+
+
+def sector_cumulative_returns(country_code):
+    """
+    Monthly cumulative returns of the country's charted stocks, computed once per data version.
+    """
+    return _cached_sector_returns(country_code, artifact_version('featured_dataset'))
+
+
+def rolling_panel_columns(country_code):
+    """
+    The country's (window, country, ticker) columns of the rolling correlation panel, by window.
+    """
+    try:
+        columns = [col for col in get_columns('rolling_correlation') if col[1] == country_code]
+    except FileNotFoundError:
+        return {}
+    windows = sorted({col[0] for col in columns})
+    return {window: [col for col in columns if col[0] == window] for window in windows}
+
+
+def category_since(columns, as_of):
+    """
+    Date of each rolling correlation column's latest category change on or before
+    `as_of` (NaT if it kept its category throughout), from the screener's
+    regime_changes flags, or None when the screen stage has not written them.
+    """
+    try:
+        changes = _with_datetime_index(get_frame('regime_changes', columns)).loc[:as_of]
+    except FileNotFoundError:
+        return None
+    return changes.apply(lambda flags: flags.index[flags.to_numpy(dtype=bool)].max())
+
+
+def loading_uncertainty(country_code):
+    """
+    Bootstrap intervals of the country's loadings ({driver name: (full-sample loading,
+    lower, upper)}) and its explained-variance row, or ({}, None) when the loadings stage
+    has not run. The intervals are centred on a full-sample fit, not on the incrementally
+    updated loadings of index_data.
+    """
+    try:
+        intervals = get_frame('loading_intervals')
+        explained = get_frame('explained_variance')
+    except FileNotFoundError:
+        return {}, None
+    intervals = intervals[intervals['country_code'] == country_code]
+    explained = explained[explained['country_code'] == country_code]
+    bounds = {name: (loading, lower, upper) for name, loading, lower, upper in zip(intervals['driver_name'], intervals['loading'], intervals['lower'], intervals['upper'])}
+    return bounds, explained.iloc[0] if len(explained) else None
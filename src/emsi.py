@@ -0,0 +1,86 @@
+import argparse
+
+# Command-line entry point: `python src/emsi.py <command>`. Each command imports only
+# the modules on its own code path (serving the API never loads the pipeline, the
+# index stage never loads yfinance or wbdata), and the stages run by one command
+# share the Arrow tables they read.
+
+STAGE_GROUPS = {
+    'fetch': ('fetch', 'returns', 'news'),
+    'features': ('features', 'headlines', 'sentiment'),
+    'index': ('index', 'loadings'),
+    'screen': ('screen', 'backtest'),
+}
+
+
+def news_backend(source):
+    """
+    GDELT backend for the news stage: 'bigquery', or the path of a SQLite events database.
+    """
+    if source is None:
+        return None
+    import gdelt
+    return gdelt.BigQueryBackend() if source == 'bigquery' else gdelt.SQLiteBackend(source)
+
+
+def run_stages(args):
+    import backend
+    from pipeline import run_pipeline
+    from profiling import enable_profiling
+    from storage import enable_table_cache
+
+    enable_profiling()
+    enable_table_cache()
+    stages = backend.pipeline_stages(start_date=args.start, end_date=args.end, refit=args.refit, workers=args.workers, executor=args.executor,
+                                     news_backend=news_backend(args.news_backend), headlines=args.headlines)
+    if args.command != 'run':
+        stages = [stage for stage in stages if stage.name in STAGE_GROUPS[args.command]]
+    force = {stage.name for stage in stages} if args.force else set()
+    if args.refit and any(stage.name == 'index' for stage in stages):
+        force.add('index')
+    status = run_pipeline(stages, force=force)
+    print(f"{args.command}: {sum(state == 'ran' for state in status.values())}/{len(status)} stages ran")
+
+
+def serve(args):
+    import api
+    api.main(args.host, args.port)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='emsi', description="Emerging Market Stability Index pipeline and API.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    descriptions = {
+        'fetch': "Refresh market prices, World Bank indicators, stock returns and (with --news-backend) GDELT news tone",
+        'features': "Build volatility (and, with headlines, sentiment) features",
+        'index': "Extend the stability index and bootstrap its loadings",
+        'screen': "Rerun the stock screener and the walk-forward backtest",
+        'run': "Run every stage whose inputs or parameters changed",
+    }
+    for name, description in descriptions.items():
+        command = commands.add_parser(name, help=description, description=description)
+        command.add_argument('--start', help="history start date (default: registry history_start)")
+        command.add_argument('--end', help="end date, exclusive (default: today)")
+        command.add_argument('--workers', type=int, help="worker count for parallel stages")
+        command.add_argument('--executor', choices=('process', 'thread'), default='process', help="pool type for per-country work")
+        command.add_argument('--refit', action='store_true', help="refit the index from scratch")
+        command.add_argument('--force', action='store_true', help="rerun the selected stages even if up to date")
+        command.add_argument('--news-backend', metavar='SOURCE', help="GDELT source for the news stage: 'bigquery' or a SQLite events database path")
+        command.add_argument('--headlines', metavar='CSV', help="headlines export (date, country, text) to import and score")
+        command.set_defaults(handler=run_stages)
+
+    command = commands.add_parser('serve', help="Serve the read-only JSON API", description="Serve the read-only JSON API")
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=8000)
+    command.set_defaults(handler=serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from profiling import span
+from registry import load_registry
+from storage import artifact_path, load_frame, save_frame
+
+# GDELT news-tone ingestion. Raw events never leave the database: one query per
+# batch of countries groups them by (country, day) and returns the event count,
+# tone sum and tone sum of squares, from which the daily mean and dispersion
+# follow. Results are read in chunks, and aggregated days are cached locally with
+# a high-water mark per country so a refresh only queries the days after it.
+# BigQuery is the production backend; SQLite runs the same query over a local
+# events table for tests and offline runs.
+
+GDELT_TABLE = 'gdelt-bq.gdeltv2.events'
+CHUNK_SIZE = 50000
+TONE_FEATURES = {'mean': 'News tone (mean)', 'std': 'News tone (std)', 'events': 'News events'}
+
+# The events table carries the per-event tone as AvgTone (V2Tone is a GKG field)
+AGGREGATE_SQL = """
+    SELECT ActionGeo_CountryCode AS country, SQLDATE AS day,
+           COUNT(*) AS events, SUM(AvgTone) AS tone_sum, SUM(AvgTone * AvgTone) AS tone_squares
+    FROM {table}
+    WHERE ActionGeo_CountryCode IN {countries}
+      AND SQLDATE BETWEEN {start} AND {end}
+    GROUP BY country, day
+    ORDER BY day, country
+"""
+
+
+def _sql_date(date):
+    return int(pd.Timestamp(date).strftime('%Y%m%d'))
+
+
+class BigQueryBackend:
+    """
+    Aggregates the public GDELT events table on BigQuery (needs google-cloud-bigquery and credentials).
+    """
+
+    def __init__(self, client=None, table=GDELT_TABLE):
+        self.client = client
+        self.table = table
+
+    def daily_aggregates(self, countries, start_date, end_date, chunk_size=CHUNK_SIZE):
+        """
+        Yields (country, day, events, tone_sum, tone_squares) chunks for the FIPS country
+        codes between start_date and end_date (inclusive).
+        """
+        from google.cloud import bigquery
+        client = self.client or bigquery.Client()
+        query = AGGREGATE_SQL.format(table=f'`{self.table}`', countries='UNNEST(@countries)', start='@start_date', end='@end_date')
+        params = [
+            bigquery.ArrayQueryParameter('countries', 'STRING', list(countries)),
+            bigquery.ScalarQueryParameter('start_date', 'INT64', _sql_date(start_date)),
+            bigquery.ScalarQueryParameter('end_date', 'INT64', _sql_date(end_date)),
+        ]
+        rows = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params)).result(page_size=chunk_size)
+        yield from rows.to_dataframe_iterable()
+
+
+class SQLiteBackend:
+    """
+    Runs the aggregation over a local events table (SQLDATE, ActionGeo_CountryCode, AvgTone).
+    """
+
+    def __init__(self, path=':memory:', table='events'):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.table = table
+
+    @classmethod
+    def from_events(cls, events, path=':memory:', table='events'):
+        """
+        Builds a backend whose table holds the given raw events frame.
+        """
+        backend = cls(path, table)
+        events[['SQLDATE', 'ActionGeo_CountryCode', 'AvgTone']].to_sql(table, backend.connection, if_exists='replace', index=False)
+        backend.connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_country_day ON {table} (ActionGeo_CountryCode, SQLDATE)')
+        return backend
+
+    def daily_aggregates(self, countries, start_date, end_date, chunk_size=CHUNK_SIZE):
+        countries = list(countries)
+        query = AGGREGATE_SQL.format(table=self.table, countries='(' + ', '.join('?' * len(countries)) + ')', start='?', end='?')
+        params = [*countries, _sql_date(start_date), _sql_date(end_date)]
+        yield from pd.read_sql_query(query, self.connection, params=params, chunksize=chunk_size)
+
+
+class ToneStore:
+    """
+    Persistent (country, date) -> daily tone aggregates with a high-water mark per country.
+    """
+
+    def __init__(self, name='gdelt_tone', data_dir=None):
+        self.name = name
+        self.data_dir = data_dir
+        if os.path.exists(artifact_path(name, data_dir)):
+            self.aggregates = load_frame(name, data_dir=data_dir)
+            marks = load_frame(f'{name}_marks', data_dir=data_dir)
+            self.marks = dict(zip(marks['country'], marks['high_water_mark']))
+        else:
+            self.aggregates = pd.DataFrame({
+                'country': pd.Series(dtype=str),
+                'date': pd.Series(dtype='datetime64[ns]'),
+                'events': pd.Series(dtype='int64'),
+                'tone_sum': pd.Series(dtype=float),
+                'tone_squares': pd.Series(dtype=float),
+            })
+            self.marks = {}
+
+    def refresh(self, countries, end_date, backend, start_date=None, chunk_size=CHUNK_SIZE):
+        """
+        Aggregates the days missing for each country ({code: FIPS code}) up to end_date
+        (exclusive). Countries sharing a high-water mark are queried together in one pass.
+        """
+        start_date = start_date or load_registry().history_start
+        last_day = pd.Timestamp(end_date) - pd.Timedelta(days=1)
+
+        pending = {}
+        for code in countries:
+            mark = self.marks.get(code)
+            fetch_from = pd.Timestamp(start_date) if mark is None else mark + pd.Timedelta(days=1)
+            if fetch_from <= last_day:
+                pending.setdefault(fetch_from, []).append(code)
+
+        with span('fetch.gdelt', batches=len(pending)) as current:
+            stale = sum(len(batch) for batch in pending.values())
+            current.hit(len(countries) - stale)
+            current.miss(stale)
+            if not pending:
+                print(f"News tone up to date for {len(countries)} countries")
+                return 0
+
+            new_rows = []
+            for fetch_from, batch in pending.items():
+                code_of = {countries[code]: code for code in batch}
+                for chunk in backend.daily_aggregates(list(code_of), fetch_from, last_day, chunk_size):
+                    new_rows.append(pd.DataFrame({
+                        'country': chunk['country'].map(code_of),
+                        'date': pd.to_datetime(chunk['day'].astype(str), format='%Y%m%d'),
+                        'events': chunk['events'].astype('int64'),
+                        'tone_sum': chunk['tone_sum'].astype(float),
+                        'tone_squares': chunk['tone_squares'].astype(float),
+                    }))
+                    current.add_bytes(chunk.memory_usage(deep=True).sum())
+                for code in batch:
+                    self.marks[code] = last_day
+            appended = pd.concat(new_rows, ignore_index=True) if new_rows else self.aggregates.iloc[:0]
+            current.rows_out = len(appended)
+        if not appended.empty:
+            self.aggregates = pd.concat([self.aggregates, appended], ignore_index=True)
+        self.save()
+        print(f"Aggregated {len(appended)} new country-days of news tone")
+        return len(appended)
+
+    def daily(self, countries=None, start_date=None, end_date=None):
+        """
+        Long (country, date, events, mean, std) frame; std is the sample std of event tones.
+        """
+        rows = self.aggregates if countries is None else self.aggregates[self.aggregates['country'].isin(countries)]
+        if start_date is not None:
+            rows = rows[rows['date'] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            rows = rows[rows['date'] < pd.Timestamp(end_date)]
+        events = rows['events'].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = rows['tone_sum'].to_numpy() / events
+            variance = (rows['tone_squares'].to_numpy() - rows['tone_sum'].to_numpy() * mean) / (events - 1)
+        return pd.DataFrame({
+            'country': rows['country'].to_numpy(),
+            'date': rows['date'].to_numpy(),
+            'events': rows['events'].to_numpy(),
+            'mean': mean,
+            'std': np.sqrt(np.maximum(variance, 0.0)),
+        })
+
+    def save(self):
+        save_frame(self.aggregates, self.name, data_dir=self.data_dir)
+        marks = pd.DataFrame({'country': list(self.marks), 'high_water_mark': list(self.marks.values())})
+        save_frame(marks, f'{self.name}_marks', data_dir=self.data_dir)
+
+
+def tone_features(daily, registry=None):
+    """
+    Wide date x (feature, country name) frame of the daily tone statistics. The tuple
+    columns classify like the World Bank series, so a country's schema selects them.
+    """
+    registry = registry or load_registry()
+    wide = daily.pivot(index='date', columns='country', values=list(TONE_FEATURES))
+    wide.columns = pd.Index([(TONE_FEATURES[stat], registry.by_code[code].name) for stat, code in wide.columns], tupleize_cols=False)
+    wide.index.name = None
+    return wide
+
+
+def main(start_date=None, end_date=None, backend=None, store=None):
+    """
+    Refreshes the cached daily aggregates for every registered country and saves 'news_tone'.
+    """
+    registry = load_registry()
+    start_date = start_date or registry.history_start
+    end_date = end_date or pd.Timestamp.today().strftime('%Y-%m-%d')
+    store = store or ToneStore()
+    countries = {country.code: country.fips for country in registry.countries}
+    store.refresh(countries, end_date, backend or BigQueryBackend(), start_date)
+    save_frame(tone_features(store.daily(list(countries), start_date, end_date), registry), 'news_tone')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from panel import ffill_trimmed
+from profiling import traced
+from storage import DATA_DIR
+
+# Incremental stability index engine. The first fit reproduces StandardScaler +
+# PCA(n_components=1) exactly (population-std scaling, first principal component). Later
+# days update the running mean/variance with Welford's method and the first
+# component with a covariance-free (CCIPCA) step, so appending a row costs
+# O(features) and never rewrites published history.
+
+
+def _scale(m2, count, mean):
+    # Population std per feature; constant features keep scale 1, as in StandardScaler
+    variance = m2 / count
+    eps = np.finfo(float).eps
+    constant = variance <= count * eps * variance + (count * mean * eps) ** 2
+    return np.where(constant, 1.0, np.sqrt(variance))
+
+
+class IncrementalIndex:
+    """
+    Running scaler and first-component state for one country's stability index.
+    """
+
+    def __init__(self, columns, count, mean, m2, component, last_row, last_date):
+        # JSON state stores tuple labels (news aggregates) as lists
+        self.columns = [tuple(column) if isinstance(column, list) else column for column in columns]
+        self.count = int(count)
+        self.mean = np.asarray(mean, dtype=float)
+        self.m2 = np.asarray(m2, dtype=float)
+        self.component = np.asarray(component, dtype=float)
+        self.last_row = np.asarray(last_row, dtype=float)
+        self.last_date = pd.Timestamp(last_date)
+
+    @property
+    def scale(self):
+        return _scale(self.m2, self.count, self.mean)
+
+    @property
+    def loadings(self):
+        return pd.Series(self.component / np.linalg.norm(self.component), index=self.columns)
+
+    @classmethod
+    @traced('pca.fit')
+    def fit(cls, df, anchor=None):
+        """
+        Fits the scaler and first component on a clean (forward-filled, NaN-free) history.
+        The sign is fixed so the anchor feature (default: the largest loading) loads positively.
+        Returns the engine and the index over that history.
+        """
+        values = df.to_numpy(dtype=float)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        scaled = (values - mean) / _scale(m2, len(values), mean)
+
+        eigenvalues, eigenvectors = np.linalg.eigh(scaled.T @ scaled / len(values))
+        direction = eigenvectors[:, -1]
+        anchor_pos = df.columns.get_loc(anchor) if anchor in df.columns else int(np.argmax(np.abs(direction)))
+        if direction[anchor_pos] < 0:
+            direction = -direction
+
+        engine = cls(df.columns, len(values), mean, m2, eigenvalues[-1] * direction, values[-1], df.index[-1])
+        return engine, pd.Series(scaled @ direction, index=df.index, name='stability_index')
+
+    @traced('pca.update')
+    def update(self, df):
+        """
+        Folds new rows (dated after the last processed day) into the state and returns
+        their index values; missing values are carried forward from the previous row.
+        """
+        df = df.loc[df.index > self.last_date, self.columns]
+        values = []
+        for date, row in zip(df.index, df.to_numpy(dtype=float)):
+            x = np.where(np.isnan(row), self.last_row, row)
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+            u = (x - self.mean) / self.scale
+
+            norm = np.linalg.norm(self.component)
+            updated = (self.count - 1) / self.count * self.component + u * (u @ self.component) / (self.count * norm)
+            if updated @ self.component < 0:
+                updated = -updated
+            self.component = updated
+
+            values.append(u @ self.component / np.linalg.norm(self.component))
+            self.last_row, self.last_date = x, date
+        return pd.Series(values, index=df.index, name='stability_index', dtype=float)
+
+    def score(self, values):
+        """
+        Index values of feature rows under the current scaler and component, without
+        folding them into the state (used for intraday readings between daily updates).
+        """
+        values = np.asarray(values, dtype=float)
+        return (values - self.mean) / self.scale @ (self.component / np.linalg.norm(self.component))
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'count': self.count,
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+            'component': self.component.tolist(),
+            'last_row': self.last_row.tolist(),
+            'last_date': self.last_date.strftime('%Y-%m-%d'),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+    def save(self, country_code, name='full_stability_index', data_dir=None):
+        path = state_path(country_code, name, data_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, country_code, name='full_stability_index', data_dir=None):
+        path = state_path(country_code, name, data_dir)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def state_path(country_code, name='full_stability_index', data_dir=None):
+    """
+    Location of the engine state behind one country's column of a published index artifact.
+    """
+    return os.path.join(data_dir or DATA_DIR, 'index_state', name, f'{country_code}.json')
+
+
+def extend_index(country_code, country_df, history=None, anchor=None, refit=False, name='full_stability_index', data_dir=None):
+    """
+    Extends a country's published index with the days after its saved state, or fits
+    from scratch when there is no usable state (or refit is requested).
+    Returns the full index series and the current loadings.
+    """
+    engine = None if refit or history is None else IncrementalIndex.load(country_code, name, data_dir)
+    # The state is only reusable if it describes the same features and ends where the published history ends
+    if engine is not None and engine.columns == list(country_df.columns) and history.last_valid_index() == engine.last_date:
+        published_until = engine.last_date
+        print(f"Updating {country_code} index after {published_until.date()}...")
+        new_values = engine.update(country_df)
+        index = pd.concat([history.loc[history.index <= published_until].dropna(), new_values])
+    else:
+        print(f"Fitting {country_code} index from scratch...")
+        engine, index = IncrementalIndex.fit(ffill_trimmed(country_df), anchor)
+    engine.save(country_code, name, data_dir)
+    index.name = country_code
+    return index, engine.loadings
@@ -0,0 +1,93 @@
+import re
+
+import pandas as pd
+
+# Point-in-time alignment of macro indicators. A World Bank value for a period is
+# not known on the first day of that period: it becomes usable when it is
+# published. Every observation gets a release date (its vintage date when one is
+# supplied, otherwise period end + a per-indicator publication lag). release_frame
+# keeps one row per release date with every series' value in effect after it, and
+# MarketPanel carries each row forward to the trading days on or after it, so a
+# daily row sees the latest value released on or before it.
+
+# Months between the end of a period and the publication of its value
+DEFAULT_LAGS = {'annual': 6, 'quarterly': 3, 'monthly': 1}
+
+_QUARTER = re.compile(r'^(\d{4})Q([1-4])$')
+_MONTH = re.compile(r'^(\d{4})M(\d{2})$')
+
+
+def period_bounds(label):
+    """
+    (frequency, period end) of a World Bank date label: '2023', '2023Q2' or '2023M07'.
+    """
+    label = str(label)
+    if label.isdigit() and len(label) == 4:
+        return 'annual', pd.Timestamp(f'{label}-12-31')
+    match = _QUARTER.match(label)
+    if match:
+        return 'quarterly', pd.Period(f'{match[1]}Q{match[2]}', freq='Q').end_time.normalize()
+    match = _MONTH.match(label)
+    if match:
+        return 'monthly', pd.Period(f'{match[1]}-{match[2]}', freq='M').end_time.normalize()
+    raise ValueError(f"Unrecognized macro period label: {label!r}")
+
+
+def lookback_start(start_date, max_lag_months=max(DEFAULT_LAGS.values())):
+    """
+    Earliest period to request so the value in effect on start_date is included, for
+    publication lags of up to max_lag_months.
+    """
+    return (pd.Timestamp(start_date) - pd.DateOffset(years=1, months=max_lag_months)).strftime('%Y-%m-%d')
+
+
+def release_table(indicators, lags=None, vintages=None):
+    """
+    Long table (indicator, country, period_end, release_date, value) of World Bank data
+    indexed by (country, date) with one column per indicator. `lags` maps an indicator
+    to its publication lag in months (default by frequency). `vintages`, a long frame
+    with the same columns plus an explicit release_date, adds or overrides releases.
+    """
+    lags = lags or {}
+    long = indicators.stack().rename('value').reset_index()
+    long.columns = ['country', 'period', 'indicator', 'value']
+    long = long.dropna(subset=['value'])
+
+    bounds = {label: period_bounds(label) for label in long['period'].unique()}
+    frequency = long['period'].map(lambda label: bounds[label][0])
+    long['period_end'] = long['period'].map(lambda label: bounds[label][1])
+    months = [lags.get(indicator, DEFAULT_LAGS[freq]) for indicator, freq in zip(long['indicator'], frequency)]
+    long['release_date'] = [end + pd.DateOffset(months=m) for end, m in zip(long['period_end'], months)]
+    table = long[['indicator', 'country', 'period_end', 'release_date', 'value']]
+
+    if vintages is not None and len(vintages):
+        table = pd.concat([table, vintages[['indicator', 'country', 'period_end', 'release_date', 'value']]], ignore_index=True)
+    table = table.astype({'period_end': 'datetime64[ns]', 'release_date': 'datetime64[ns]'})
+    return latest_vintages(table)
+
+
+def latest_vintages(table):
+    """
+    Orders releases by date and drops revisions of periods that a newer period has
+    already superseded, so a late revision of an old year never replaces the current value.
+    """
+    table = table.sort_values(['release_date', 'period_end'], kind='stable')
+    newest_period = table.groupby(['indicator', 'country'])['period_end'].cummax()
+    return table[table['period_end'] >= newest_period].reset_index(drop=True)
+
+
+def _series_keys(table):
+    return sorted(set(zip(table['indicator'], table['country'])))
+
+
+def release_frame(table):
+    """
+    One row per release date with every series' value in effect after it (the layout
+    MarketPanel keeps for macro columns and broadcasts to daily rows).
+    """
+    keys = _series_keys(table)
+    wide = table.pivot_table(index='release_date', columns=['indicator', 'country'], values='value', aggfunc='last')
+    wide = wide.reindex(columns=pd.MultiIndex.from_tuples(keys)).ffill()
+    wide.columns = pd.Index(keys, tupleize_cols=False)
+    wide.index.name = None
+    return wide
@@ -1,74 +1,53 @@
-import pandas as pd
-import os
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def preprocess_data(df):
+from incremental_index import extend_index
+
+def calculate_outlook(stability_index, short_window=7, long_window=14, cautious_ratio=1.5, bullish_ratio=0.75):
     """
-    Preprocesses the data for PCA by scaling and filling missing values.
+    Classifies the latest short-window vs long-window volatility of index changes.
+    With the default 7/14-day windows the ratio cannot exceed sqrt(13/6) ~ 1.47, so
+    "Cautious" is never returned (see scenarios.OUTLOOK).
     """
-    print("Preprocessing data...")
-    df = df.fillna(method='ffill').dropna()
-    scaler = StandardScaler()
-    scaled_data = scaler.fit_transform(df)
-    return pd.DataFrame(scaled_data, index=df.index, columns=df.columns)
-
-def build_index(df):
+    changes = stability_index.pct_change()
+    vol_short = changes.rolling(window=short_window).std().iloc[-1]
+    vol_long = changes.rolling(window=long_window).std().iloc[-1]
+    if vol_short > vol_long * cautious_ratio:
+        return "Cautious"
+    if vol_short < vol_long * bullish_ratio:
+        return "Bullish"
+    return "Neutral"
+
+def build_country_index(country_code, country_df, history=None, anchor=None, refit=False, name='full_stability_index', data_dir=None):
     """
-    Builds the stability index using PCA and identifies key drivers.
+    Country stage: extends (or fits) one country's index and derives its outlook.
+    Countries share no state, so this runs safely in a worker process.
     """
-    print("Building index...")
-    pca = PCA(n_components=1)
-    principal_components = pca.fit_transform(df)
-    
-    # Create the index series
-    index = pd.Series(principal_components.flatten(), index=df.index, name='Stability_Index')
-    
-    # Get feature loadings to identify key drivers
-    loadings = pd.Series(pca.components_[0], index=df.columns)
-    
-    return index, loadings
+    print(f"Building index for {country_code}...")
+    stability_index, loadings = extend_index(country_code, country_df, history, anchor=anchor, refit=refit, name=name, data_dir=data_dir)
+    return {'country_code': country_code, 'stability_index': stability_index, 'loadings': loadings, 'outlook': calculate_outlook(stability_index)}
 
-def main():
+def build_country_indices(tasks, workers=None, executor='process'):
     """
-    Main function to orchestrate the model building pipeline.
+    Runs the country stage for every task (keyword arguments of build_country_index) on a
+    process or thread pool. Results come back in task order; workers=1 runs serially.
     """
-    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-    input_path = os.path.join(data_dir, 'featured_dataset.csv')
-    df = pd.read_csv(input_path, index_col=0, parse_dates=True)
-    
-    country_map = {
-        "BRA": ["^BVSP", "BRLUSD=X"],
-        "IND": ["^NSEI", "INRUSD=X"],
-        "ZAF": ["^J203.JO", "ZARUSD=X"],
-        "POL": ["^WIG20", "PLNUSD=X"]
-    }
-
-    all_indices = []
-
-    for country_code, assets in country_map.items():
-        print(f"Building index for {country_code}...")
-        
-        # Filter columns for the specific country
-        country_columns = [col for col in df.columns if any(asset in col for asset in assets)]
-        country_df = df[country_columns]
-
-        # Preprocess the data
-        processed_df = preprocess_data(country_df)
-        
-        # Build the index
-        stability_index, loadings = build_index(processed_df)
-        stability_index.name = country_code # Rename the series
-        all_indices.append(stability_index)
-        
-        # Save loadings for the dashboard
-        loadings_output_path = os.path.join(data_dir, f'{country_code}_loadings.csv')
-        loadings.to_csv(loadings_output_path)
+    if workers == 1 or len(tasks) <= 1:
+        return [build_country_index(**task) for task in tasks]
+    pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        futures = [pool.submit(build_country_index, **task) for task in tasks]
+        return [future.result() for future in futures]
+
+def main(refit=False, workers=None, executor='process'):
+    """
+    Runs the pipeline's index stage: extends each country's published index from its
+    saved state, or refits it from scratch when refit is set.
+    """
+    import backend
+    from pipeline import run_pipeline
 
-    # Combine all indices into a single dataframe
-    final_indices = pd.concat(all_indices, axis=1)
-    final_indices_output_path = os.path.join(data_dir, 'stability_index.csv')
-    final_indices.to_csv(final_indices_output_path)
+    stages = [stage for stage in backend.pipeline_stages(refit=refit, workers=workers, executor=executor) if stage.name == 'index']
+    run_pipeline(stages, force={'index'} if refit else ())
     print("Index building complete for all countries.")
 
 if __name__ == "__main__":
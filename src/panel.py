@@ -0,0 +1,121 @@
+import pandas as pd
+
+from profiling import traced
+
+# Compact in-memory layout for the wide daily frames (unified/featured datasets).
+# Price and volatility columns are held in one configurable float dtype (float32 by
+# default, half the float64 footprint). World Bank macro columns, keyed by
+# (indicator, country) tuples, change once per release, so only the rows where a
+# value changes are kept and the daily view is broadcast on demand.
+
+PANEL_DTYPE = 'float32'
+
+
+def is_macro(column):
+    return isinstance(column, tuple)
+
+
+def release_points(macro):
+    """
+    Rows of a daily macro frame on which at least one series takes a new value,
+    carrying every series' current value, so a forward-filling reindex restores it.
+    """
+    filled = macro.ffill()
+    changed = (filled.ne(filled.shift()) & filled.notna()).to_numpy().any(axis=1)
+    return filled[changed]
+
+
+@traced('preprocess')
+def ffill_trimmed(df):
+    """
+    Equivalent to df.ffill().dropna() without a second full copy: after a forward fill a
+    column stays valid once it starts, so the complete rows are a suffix, returned as a slice.
+    """
+    filled = df.ffill()
+    complete = filled.notna().to_numpy().all(axis=1)
+    if not complete.any():
+        return filled.iloc[:0]
+    return filled.iloc[int(complete.argmax()):]
+
+
+class MarketPanel:
+    """
+    Daily market block in a compact float dtype plus macro series kept at their release dates.
+    """
+
+    def __init__(self, market, macro, dtype=PANEL_DTYPE):
+        self.market = market if dtype is None else market.astype(dtype)
+        self.macro = macro
+
+    @classmethod
+    def from_frame(cls, df, dtype=PANEL_DTYPE):
+        macro_columns = [col for col in df.columns if is_macro(col)]
+        market = df[[col for col in df.columns if not is_macro(col)]]
+        return cls(market, release_points(df[macro_columns]), dtype)
+
+    @property
+    def index(self):
+        return self.market.index
+
+    @property
+    def columns(self):
+        return list(self.macro.columns) + list(self.market.columns)
+
+    @property
+    def nbytes(self):
+        return int(self.market.memory_usage(index=False).sum() + self.macro.memory_usage(index=False).sum())
+
+    def broadcast_macro(self, columns=None):
+        """
+        Daily view of the macro series: each value holds from its release date onwards.
+        """
+        macro = self.macro if columns is None else self.macro[list(columns)]
+        return macro.reindex(self.market.index, method='ffill')
+
+    def with_macro(self, macro, counts=()):
+        """
+        A panel with more date-indexed series (e.g. daily news aggregates) merged into the
+        macro release rows. Each series keeps its latest value on rows added by the others,
+        except the `counts` columns: those are summed onto the trading day on or after each
+        observation and are 0 on trading days without one, from their first observation on.
+        """
+        counts = [column for column in macro.columns if column in set(counts)]
+        combined = pd.concat([self.macro, macro.drop(columns=counts)], axis=1, sort=True).ffill()
+        if counts:
+            positions = self.market.index.searchsorted(macro.index)
+            known = positions < len(self.market.index)
+            daily = macro.loc[known, counts].groupby(self.market.index[positions[known]]).sum(min_count=1).reindex(self.market.index)
+            daily = daily.fillna(0).where(daily.notna().cummax())
+            combined = pd.concat([combined, daily], axis=1, sort=True)
+            levels = combined.columns.difference(counts, sort=False)
+            combined[levels] = combined[levels].ffill()
+        return MarketPanel(self.market, combined, dtype=None)
+
+    def with_market(self, market):
+        """
+        A panel sharing this one's macro releases with a new (e.g. feature-extended) market block.
+        """
+        return MarketPanel(market, self.macro, dtype=None)
+
+    def frame(self, columns=None):
+        """
+        Dense frame of the requested columns; macro columns are broadcast only if requested.
+        """
+        columns = self.columns if columns is None else list(columns)
+        market_columns = [col for col in columns if not is_macro(col)]
+        macro_columns = [col for col in columns if is_macro(col)]
+        parts = [self.market[market_columns]]
+        if macro_columns:
+            parts.insert(0, self.broadcast_macro(macro_columns))
+        return pd.concat(parts, axis=1)[columns]
+
+    def to_frame(self):
+        """
+        Storage layout: the daily market block with macro values only on their release
+        rows (NaN in between), which from_frame reads back into the same panel.
+        """
+        # A release lands on the first trading day on or after it; later ones are not yet known
+        positions = self.market.index.searchsorted(self.macro.index)
+        known = positions < len(self.market.index)
+        macro = self.macro[known].groupby(self.market.index[positions[known]]).last().reindex(self.market.index)
+        return pd.concat([macro, self.market], axis=1)
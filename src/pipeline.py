@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from profiling import span
+from storage import DATA_DIR, artifact_path
+
+# Stage-level DAG runner. Each stage declares the artifacts it reads and writes plus
+# the parameters that shape its output. The cache key is a hash of the parameters
+# and the content of every input, and the manifest records it together with the
+# content hash of each output, so a stage only reruns when something it depends on
+# actually changed. Stages whose inputs are ready run concurrently on a thread pool.
+
+MANIFEST_NAME = 'pipeline_manifest.json'
+
+
+class Stage:
+    """
+    One pipeline step: `run(**params)` reads `inputs` and writes `outputs` (artifact names).
+    Only `params` enter the cache key; runtime options such as the data provider or
+    worker count should be bound into `run` instead.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), params=None):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+
+
+def content_hash(name, data_dir=None):
+    """
+    SHA-256 of an artifact's file (Parquet, or the legacy CSV), or None if it does not exist.
+    """
+    data_dir = data_dir or DATA_DIR
+    for path in (artifact_path(name, data_dir), os.path.join(data_dir, f'{name}.csv')):
+        if os.path.exists(path):
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            return digest.hexdigest()
+    return None
+
+
+def stage_key(stage, data_dir=None):
+    """
+    Cache key of a stage: its parameters plus the content of every input artifact.
+    """
+    digest = hashlib.sha256(stage.name.encode())
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for name in stage.inputs:
+        input_hash = content_hash(name, data_dir)
+        if input_hash is None:
+            raise FileNotFoundError(f"Stage '{stage.name}' needs artifact '{name}', which does not exist")
+        digest.update(f'{name}={input_hash}'.encode())
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Stage name -> {key, outputs: {artifact: content hash}} of the last successful runs.
+    """
+
+    def __init__(self, data_dir=None):
+        self.path = os.path.join(data_dir or DATA_DIR, MANIFEST_NAME)
+        self.data_dir = data_dir
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        self._lock = threading.Lock()
+
+    def is_fresh(self, stage, key):
+        entry = self.entries.get(stage.name)
+        if entry is None or entry['key'] != key or set(entry['outputs']) != set(stage.outputs):
+            return False
+        # Outputs edited or deleted since the run invalidate it as well
+        return all(content_hash(name, self.data_dir) == recorded for name, recorded in entry['outputs'].items())
+
+    def record(self, stage, key):
+        outputs = {name: content_hash(name, self.data_dir) for name in stage.outputs}
+        missing = [name for name, output_hash in outputs.items() if output_hash is None]
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not write its declared outputs: {missing}")
+        with self._lock:
+            self.entries[stage.name] = {'key': key, 'outputs': outputs}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+def _dependencies(stages):
+    producers = {}
+    for stage in stages:
+        for name in stage.outputs:
+            if name in producers:
+                raise ValueError(f"Artifact '{name}' is written by both '{producers[name]}' and '{stage.name}'")
+            producers[name] = stage.name
+    return {stage.name: {producers[name] for name in stage.inputs if name in producers} for stage in stages}
+
+
+def run_pipeline(stages, force=(), workers=None, data_dir=None):
+    """
+    Runs the stages in dependency order, skipping those whose manifest entry still
+    matches their key. Stages named in `force` always run. Returns {stage: 'ran' | 'cached'}.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    dependencies = _dependencies(stages)
+    unknown = set(force) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {sorted(unknown)}")
+
+    manifest = Manifest(data_dir)
+    status = {}
+
+    def execute(stage):
+        with span(f'stage.{stage.name}') as current:
+            key = stage_key(stage, data_dir)
+            if stage.name not in force and manifest.is_fresh(stage, key):
+                print(f"[pipeline] {stage.name}: up to date, skipped")
+                current.hit()
+                return 'cached'
+            print(f"[pipeline] {stage.name}: running...")
+            current.miss()
+            stage.run(**stage.params)
+            manifest.record(stage, key)
+            print(f"[pipeline] {stage.name}: done")
+            return 'ran'
+
+    pending = dict(dependencies)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            ready = [name for name, needs in pending.items() if needs <= set(status)]
+            for name in ready:
+                del pending[name]
+                running[pool.submit(execute, by_name[name])] = name
+            if not running:
+                raise ValueError(f"Stages with unresolvable dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                # A failed stage stops the run; stages already running finish first
+                status[name] = future.result()
+    return status
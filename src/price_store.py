@@ -0,0 +1,117 @@
+import os
+import threading
+
+import pandas as pd
+
+from profiling import span
+from providers import LiveProvider
+from registry import load_registry
+from storage import artifact_path, load_frame, save_frame
+
+
+class PriceStore:
+    """
+    Persistent (ticker, date) -> close store with low- and high-water marks per ticker
+    (the first day it was fetched from and its last stored close). A refresh only asks the
+    provider for the days before the low mark (a backfill when the start moves back) and
+    after the high mark, and appends them.
+    Refreshes and reads hold a lock, so pipeline stages running concurrently can share one store.
+    """
+
+    def __init__(self, name='price_store', data_dir=None):
+        self.name = name
+        self.data_dir = data_dir
+        self._lock = threading.RLock()
+        if os.path.exists(artifact_path(name, data_dir)):
+            self.prices = load_frame(name, data_dir=data_dir)
+            marks = load_frame(f'{name}_marks', data_dir=data_dir)
+            self.marks = dict(zip(marks['ticker'], marks['high_water_mark']))
+            if 'low_water_mark' in marks.columns:
+                self.low_marks = dict(zip(marks['ticker'], marks['low_water_mark']))
+            else:
+                # Stores written before low marks: covered from each ticker's first close
+                self.low_marks = self.prices.groupby('ticker')['date'].min().to_dict()
+        else:
+            self.prices = pd.DataFrame({'ticker': pd.Series(dtype=str), 'date': pd.Series(dtype='datetime64[ns]'), 'close': pd.Series(dtype=float)})
+            self.marks = {}
+            self.low_marks = {}
+
+    def high_water_mark(self, ticker):
+        return self.marks.get(ticker)
+
+    def low_water_mark(self, ticker):
+        return self.low_marks.get(ticker)
+
+    def refresh(self, tickers, end_date, provider=None, start_date=None):
+        """
+        Fetches the days missing for each ticker from start_date (default: the registry's
+        history start) to end_date (exclusive) and appends them. Tickers missing the same
+        window are fetched together in one provider call. A ticker the provider has no
+        data for is marked covered up to end_date, so later runs do not ask for it again.
+        """
+        with self._lock:
+            return self._refresh(tickers, end_date, provider, start_date)
+
+    def _refresh(self, tickers, end_date, provider, start_date):
+        provider = provider or LiveProvider()
+        start = pd.Timestamp(start_date or load_registry().history_start)
+        end = pd.Timestamp(end_date)
+
+        # (from, to) -> tickers: the days before each ticker's low mark and after its high mark
+        pending = {}
+        for ticker in dict.fromkeys(tickers):
+            low = self.low_marks.get(ticker)
+            windows = [(start, end)] if low is None else [(start, low), (self.marks[ticker] + pd.Timedelta(days=1), end)]
+            for fetch_from, fetch_to in windows:
+                if fetch_from < fetch_to:
+                    pending.setdefault((fetch_from, fetch_to), []).append(ticker)
+
+        with span('fetch.refresh', batches=len(pending)) as current:
+            # Tickers already covered up to end_date are cache hits of the store
+            stale = sum(len(batch) for batch in pending.values())
+            current.hit(len(set(tickers)) - stale)
+            current.miss(stale)
+            if not pending:
+                print(f"Price store up to date for {len(tickers)} tickers")
+                return 0
+
+            new_rows = []
+            for (fetch_from, fetch_to), batch in pending.items():
+                closes = provider.fetch_prices(batch, fetch_from.strftime('%Y-%m-%d'), fetch_to.strftime('%Y-%m-%d'))
+                rows = closes.rename_axis('date').reset_index().melt(id_vars='date', var_name='ticker', value_name='close').dropna(subset=['close'])
+                new_rows.append(rows[(rows['date'] >= fetch_from) & (rows['date'] < fetch_to)])
+
+            appended = pd.concat(new_rows, ignore_index=True)[['ticker', 'date', 'close']]
+            current.rows_out = len(appended)
+        if not appended.empty:
+            self.prices = pd.concat([self.prices, appended], ignore_index=True)
+        last_dates = appended.groupby('ticker')['date'].max()
+        for ticker in {ticker for batch in pending.values() for ticker in batch}:
+            self.low_marks[ticker] = min(start, self.low_marks.get(ticker, start))
+            if ticker in last_dates.index:
+                self.marks[ticker] = max(last_dates[ticker], self.marks.get(ticker, last_dates[ticker]))
+            elif self.marks.get(ticker) is None:
+                self.marks[ticker] = end - pd.Timedelta(days=1)
+        self.save()
+        print(f"Appended {len(appended)} new price rows across {appended['ticker'].nunique()} tickers")
+        return len(appended)
+
+    def closes(self, tickers, start_date=None, end_date=None):
+        """
+        Returns a date x ticker frame of stored closes; end_date is exclusive.
+        """
+        with self._lock:
+            rows = self.prices[self.prices['ticker'].isin(tickers)]
+        if start_date is not None:
+            rows = rows[rows['date'] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            rows = rows[rows['date'] < pd.Timestamp(end_date)]
+        wide = rows.pivot(index='date', columns='ticker', values='close')
+        wide = wide.reindex(columns=[ticker for ticker in dict.fromkeys(tickers) if ticker in wide.columns])
+        wide.columns.name = None
+        return wide
+
+    def save(self):
+        save_frame(self.prices, self.name, data_dir=self.data_dir)
+        marks = pd.DataFrame({'ticker': list(self.marks), 'low_water_mark': [self.low_marks[ticker] for ticker in self.marks], 'high_water_mark': list(self.marks.values())})
+        save_frame(marks, f'{self.name}_marks', data_dir=self.data_dir)
@@ -0,0 +1,235 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Structured instrumentation for the pipeline hot paths. Each span emits one JSON
+# line with wall/CPU time, rows in and out, peak memory, network bytes and cache
+# hits/misses. Behaviour is controlled by environment variables:
+#   EMSI_PROFILE      off (default) | spans | tracemalloc | cprofile
+#   EMSI_PROFILE_LOG  JSON-lines output file (default data/profile.jsonl)
+# 'tracemalloc' adds the traced Python allocation peak of every span; 'cprofile'
+# writes a .prof file per top-level span next to the log. Network bytes are the
+# size of the payloads the providers received, as decoded frames. Library use (the
+# dashboard, the API) records nothing; the pipeline entry points switch spans on
+# with enable_profiling unless EMSI_PROFILE says otherwise.
+
+DEFAULT_LOG = os.path.join(os.path.dirname(__file__), '..', 'data', 'profile.jsonl')
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _reset_write_lock():
+    # A worker forked while another thread was writing would inherit the lock held
+    global _write_lock
+    _write_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_write_lock)
+
+
+def profile_mode():
+    return os.environ.get('EMSI_PROFILE', 'off').lower()
+
+
+def enable_profiling(mode='spans'):
+    """
+    Turns profiling on for this process (and the workers it starts) unless EMSI_PROFILE is set.
+    """
+    os.environ.setdefault('EMSI_PROFILE', mode)
+
+
+def log_path():
+    return os.environ.get('EMSI_PROFILE_LOG', DEFAULT_LOG)
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Span:
+    """
+    Counters of one instrumented region; callers fill in rows, bytes and cache results.
+    """
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.parent = parent
+        self.attrs = dict(attrs)
+        self.rows_in = None
+        self.rows_out = None
+        self.net_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.traced_peak = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def hit(self, count=1):
+        self.cache_hits += count
+
+    def miss(self, count=1):
+        self.cache_misses += count
+
+    def add_bytes(self, count):
+        self.net_bytes += int(count)
+
+
+def _emit(record):
+    path = log_path()
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(line + '\n')
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times the enclosed block as a named span nested under the current one (per thread)
+    and emits it as a JSON line when the block exits, including on error.
+    """
+    mode = profile_mode()
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    current = Span(name, parent.name if parent else None, attrs)
+    if mode == 'off':
+        yield current
+        return
+
+    tracing = mode == 'tracemalloc'
+    if tracing:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # Keep the parent's peak so far before restarting the measurement for this span
+        if parent is not None:
+            parent.traced_peak = max(parent.traced_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    profiler = None
+    if mode == 'cprofile' and parent is None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is active in this thread
+            profiler = None
+
+    stack.append(current)
+    started, wall, cpu = time.time(), time.perf_counter(), time.process_time()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        stack.pop()
+        record = {
+            'span': name,
+            'parent': current.parent,
+            'started': pd.Timestamp(started, unit='s').isoformat(),
+            'wall_s': round(time.perf_counter() - wall, 6),
+            'cpu_s': round(time.process_time() - cpu, 6),
+            'rows_in': current.rows_in,
+            'rows_out': current.rows_out,
+            'peak_rss_mb': _peak_rss_mb(),
+            'net_bytes': current.net_bytes,
+            'cache_hits': current.cache_hits,
+            'cache_misses': current.cache_misses,
+            'pid': os.getpid(),
+            'thread': threading.current_thread().name,
+        }
+        if tracing:
+            current.traced_peak = max(current.traced_peak, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_mb'] = round(current.traced_peak / 2 ** 20, 2)
+            if parent is not None:
+                parent.traced_peak = max(parent.traced_peak, current.traced_peak)
+        if profiler is not None:
+            profiler.disable()
+            prof_path = os.path.join(os.path.dirname(os.path.abspath(log_path())), 'profiles', f"{name}-{int(started * 1000)}-{os.getpid()}.prof")
+            os.makedirs(os.path.dirname(prof_path), exist_ok=True)
+            profiler.dump_stats(prof_path)
+            record['profile'] = prof_path
+        if error is not None:
+            record['error'] = error
+        record.update(current.attrs)
+        _emit(record)
+
+
+def _row_count(value):
+    if isinstance(value, tuple):
+        value = value[0] if value else None
+    if isinstance(value, (pd.DataFrame, pd.Series)) or hasattr(value, 'shape'):
+        return len(value)
+    return None
+
+
+def traced(name):
+    """
+    Decorator running a function inside a span; rows in/out are taken from its first
+    frame argument and its (first) returned frame.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as current:
+                current.rows_in = next((_row_count(arg) for arg in args if _row_count(arg) is not None), None)
+                result = func(*args, **kwargs)
+                current.rows_out = _row_count(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def load_spans(path=None):
+    """
+    Reads a span log into a DataFrame (one row per span).
+    """
+    with open(path or log_path()) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def summarize(path=None):
+    """
+    Per-span totals: calls, wall/CPU time, rows, network bytes and cache hits/misses,
+    sorted by total wall time.
+    """
+    spans = load_spans(path)
+    summary = spans.groupby('span').agg(
+        calls=('wall_s', 'size'),
+        wall_s=('wall_s', 'sum'),
+        max_wall_s=('wall_s', 'max'),
+        cpu_s=('cpu_s', 'sum'),
+        rows_out=('rows_out', 'sum'),
+        net_bytes=('net_bytes', 'sum'),
+        cache_hits=('cache_hits', 'sum'),
+        cache_misses=('cache_misses', 'sum'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+    )
+    return summary.sort_values('wall_s', ascending=False)
+
+
+if __name__ == "__main__":
+    print(summarize(sys.argv[1] if len(sys.argv) > 1 else None).to_string())
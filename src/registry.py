@@ -0,0 +1,57 @@
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'markets.json')
+
+Country = namedtuple('Country', ['code', 'iso2', 'name', 'index', 'currency', 'stocks', 'fips'])
+
+
+class Registry:
+    """
+    Countries, market tickers, stock universe and World Bank indicators from one config
+    file, precompiled into the lookup tables every stage uses.
+    """
+
+    def __init__(self, config):
+        self.history_start = config['history_start']
+        self.indicators = dict(config['indicators'])
+        # Publication lag (months after period end) per indicator name, for point-in-time joins
+        self.release_lags = {self.indicators[code]: months for code, months in config.get('release_lags', {}).items()}
+        # GDELT keys events by FIPS 10-4 code, which differs from ISO 3166 for some countries (South Africa: SF)
+        self.countries = [
+            Country(c['code'], c['iso2'], c['name'], c['index'], c['currency'], [tuple(stock) for stock in c['stocks']], c.get('fips', c['iso2']))
+            for c in config['countries']
+        ]
+
+        self.codes = [country.code for country in self.countries]
+        self.by_code = {country.code: country for country in self.countries}
+        self.by_name = {country.name: country for country in self.countries}
+        self.stock_universe = {country.code: country.stocks for country in self.countries}
+        self.dashboard_stocks = {country.code: [ticker for ticker, _ in country.stocks[:config['dashboard_stocks']]] for country in self.countries}
+
+        self.index_tickers = [country.index for country in self.countries]
+        self.currency_tickers = [country.currency for country in self.countries]
+        self.market_tickers = self.index_tickers + self.currency_tickers
+        self.stock_tickers = list(dict.fromkeys(ticker for country in self.countries for ticker, _ in country.stocks))
+
+        self.stock_country = {ticker: country.code for country in self.countries for ticker, _ in country.stocks}
+        self.company_names = {ticker: name for country in self.countries for ticker, name in country.stocks}
+        self.ticker_country = {**self.stock_country, **{country.index: country.code for country in self.countries}, **{country.currency: country.code for country in self.countries}}
+
+        duplicates = len(self.codes) - len(self.by_code)
+        if duplicates:
+            raise ValueError(f"Registry lists {duplicates} duplicate country code(s)")
+
+    def all_tickers(self):
+        """
+        Every market and stock ticker, deduplicated, in registry order.
+        """
+        return list(dict.fromkeys(self.market_tickers + self.stock_tickers))
+
+
+@lru_cache(maxsize=None)
+def load_registry(path=CONFIG_PATH):
+    with open(path, encoding='utf-8') as f:
+        return Registry(json.load(f))
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+from features import ANNUALIZATION, feature_window
+from incremental_index import IncrementalIndex
+from panel import is_macro
+from profiling import traced
+from registry import load_registry
+from storage import load_frame, save_frame
+
+# Monte Carlo stress scenarios on the fitted stability index. Daily returns of
+# every index and currency are drawn jointly (bootstrap of historical dates or a
+# Gaussian with the historical covariance), so cross-market correlation is kept;
+# a scenario adds instantaneous shocks and volatility multipliers. Paths are
+# turned into the index's level and rolling-volatility features with cumulative
+# sums, and all countries are projected at once through one block matrix holding
+# each country's persisted scaler and loadings. Everything runs on
+# (paths x days x series) arrays, in chunks of paths.
+
+PATHS = 20000
+HORIZON = 21
+CHUNK_SIZE = 5000
+LOOKBACK = 756
+# The calculate_outlook rule. The short window is the tail of the long one, so its
+# sample std is at most sqrt((long - 1) / (short - 1)) times the long window's:
+# sqrt(13 / 6) ~ 1.47 for 7/14 days, below the 1.5 Cautious ratio. With these
+# defaults prob_cautious is therefore always 0; Cautious needs a lower ratio or
+# a wider gap between the windows.
+OUTLOOK = {'short_window': 7, 'long_window': 14, 'cautious_ratio': 1.5, 'bullish_ratio': 0.75}
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def default_scenarios(registry=None):
+    """
+    Baseline, a 20% depreciation of each currency against the dollar, and doubled equity index volatility.
+    """
+    registry = registry or load_registry()
+    scenarios = {'baseline': {}}
+    for country in registry.countries:
+        scenarios[f'{country.code} currency -20%'] = {'shocks': {country.currency: -0.20}}
+    scenarios['index vol x2'] = {'vol': {ticker: 2.0 for ticker in registry.index_tickers}}
+    return scenarios
+
+
+class ScenarioEngine:
+    """
+    Simulates market paths for every country with a saved index state and projects them onto the index.
+    """
+
+    def __init__(self, registry=None, lookback=LOOKBACK, outlook=None, data_dir=None):
+        registry = registry or load_registry()
+        self.outlook = {**OUTLOOK, **(outlook or {})}
+        self.engines = {}
+        for code in registry.codes:
+            engine = IncrementalIndex.load(code, data_dir=data_dir)
+            if engine is not None:
+                self.engines[code] = engine
+        if not self.engines:
+            raise FileNotFoundError("No saved index state; run the backend before running scenarios")
+        self.countries = list(self.engines)
+
+        # Feature plan: every country's columns side by side, each tied to a series and window
+        plan = []
+        for engine in self.engines.values():
+            for column in engine.columns:
+                if is_macro(column):
+                    plan.append((None, None))  # news aggregates are not simulated
+                    continue
+                asset, _, feature = str(column).partition('_')
+                window = 0 if not feature else feature_window(feature)
+                plan.append((asset, window))
+        self.tickers = list(dict.fromkeys(asset for asset, window in plan if window is not None))
+        self.windows = sorted({window for _, window in plan if window})
+        position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.plan = [(position[asset], window) if window is not None else None for asset, window in plan]
+
+        levels = load_frame('featured_dataset', columns=self.tickers, data_dir=data_dir).astype(float).ffill()
+        returns = levels.pct_change().iloc[1:]
+        self.history = returns.dropna().iloc[-lookback:].to_numpy()
+        self.past = returns.iloc[-max(self.windows + [1]):].fillna(0.0).to_numpy()
+        self.close = levels.iloc[-1].to_numpy()
+
+        # Block projection: index = features @ weights + offset, one column per country
+        self.base_row = np.concatenate([engine.last_row for engine in self.engines.values()])
+        self.weights = np.zeros((len(self.base_row), len(self.countries)))
+        self.offset = np.zeros(len(self.countries))
+        start = 0
+        for c, engine in enumerate(self.engines.values()):
+            loadings = engine.component / np.linalg.norm(engine.component)
+            stop = start + len(engine.columns)
+            self.weights[start:stop, c] = loadings / engine.scale
+            self.offset[c] = -(engine.mean / engine.scale) @ loadings
+            start = stop
+
+        history = load_frame('full_stability_index', data_dir=data_dir)
+        tail = self.outlook['long_window'] + 1
+        self.index_history = np.column_stack([history[code].dropna().to_numpy()[-tail:] for code in self.countries])
+
+    def simulate_returns(self, paths, horizon, method, rng):
+        """
+        (paths x horizon x tickers) daily returns drawn from the historical joint distribution.
+        """
+        if method == 'bootstrap':
+            return self.history[rng.integers(0, len(self.history), size=(paths, horizon))]
+        if method == 'gaussian':
+            mean = self.history.mean(axis=0)
+            covariance = np.cov(self.history, rowvar=False).reshape(len(self.tickers), len(self.tickers))
+            factor = np.linalg.cholesky(covariance + 1e-12 * np.eye(len(self.tickers)))
+            return mean + rng.standard_normal((paths, horizon, len(self.tickers))) @ factor.T
+        raise ValueError(f"Unknown simulation method: {method!r}")
+
+    def apply(self, returns, scenario):
+        """
+        Scales returns by the scenario's volatility multipliers and compounds its shocks into day one.
+        """
+        for ticker, multiplier in scenario.get('vol', {}).items():
+            if ticker in self.tickers:
+                returns[..., self.tickers.index(ticker)] *= multiplier
+        for ticker, shock in scenario.get('shocks', {}).items():
+            if ticker in self.tickers:
+                i = self.tickers.index(ticker)
+                returns[:, 0, i] = (1 + returns[:, 0, i]) * (1 + shock) - 1
+        return returns
+
+    def features(self, returns):
+        """
+        (paths x horizon x features) index inputs along the simulated paths: price levels
+        and rolling volatility over the historical returns followed by the simulated ones.
+        """
+        paths, horizon, _ = returns.shape
+        levels = self.close * np.cumprod(1 + returns, axis=1)
+        volatility = {}
+        for window in self.windows:
+            past = np.broadcast_to(self.past[len(self.past) - (window - 1):], (paths, window - 1, len(self.tickers)))
+            extended = np.concatenate([past, returns], axis=1)
+            zero = np.zeros((paths, 1, len(self.tickers)))
+            sums = np.concatenate([zero, np.cumsum(extended, axis=1)], axis=1)
+            squares = np.concatenate([zero, np.cumsum(extended ** 2, axis=1)], axis=1)
+            total = sums[:, window:] - sums[:, :-window]
+            total_squares = squares[:, window:] - squares[:, :-window]
+            variance = np.maximum(total_squares - total ** 2 / window, 0.0) / (window - 1)
+            volatility[window] = np.sqrt(variance) * ANNUALIZATION
+
+        out = np.empty((paths, horizon, len(self.plan)))
+        for f, slot in enumerate(self.plan):
+            if slot is None:
+                out[..., f] = self.base_row[f]  # features the simulation cannot rebuild stay at their last value
+            else:
+                ticker, window = slot
+                out[..., f] = levels[..., ticker] if window == 0 else volatility[window][..., ticker]
+        return out
+
+    def outlooks(self, index_paths):
+        """
+        Outlook label (1 Bullish, 0 Neutral, -1 Cautious) at the horizon of every path and
+        country, by the calculate_outlook rule over published history plus the path.
+        """
+        paths = index_paths.shape[0]
+        history = np.broadcast_to(self.index_history, (paths,) + self.index_history.shape)
+        values = np.concatenate([history, index_paths], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            changes = values[:, 1:] / values[:, :-1] - 1
+            short = changes[:, -self.outlook['short_window']:].std(axis=1, ddof=1)
+            long = changes[:, -self.outlook['long_window']:].std(axis=1, ddof=1)
+        cautious = short > long * self.outlook['cautious_ratio']
+        bullish = short < long * self.outlook['bullish_ratio']
+        return np.where(cautious, -1, np.where(bullish, 1, 0))
+
+    @traced('scenarios')
+    def run(self, scenario=None, paths=PATHS, horizon=HORIZON, method='bootstrap', seed=0):
+        """
+        Distribution of each country's index at the horizon and its outlook probabilities
+        under one scenario ({'shocks': {ticker: return}, 'vol': {ticker: multiplier}}).
+        """
+        rng = np.random.default_rng(seed)
+        scenario = scenario or {}
+        finals, labels = [], []
+        for start in range(0, paths, CHUNK_SIZE):
+            returns = self.apply(self.simulate_returns(min(CHUNK_SIZE, paths - start), horizon, method, rng), scenario)
+            index_paths = self.features(returns) @ self.weights + self.offset
+            finals.append(index_paths[:, -1])
+            labels.append(self.outlooks(index_paths))
+        finals, labels = np.concatenate(finals), np.concatenate(labels)
+
+        base = self.index_history[-1]
+        quantiles = np.quantile(finals, QUANTILES, axis=0)
+        result = pd.DataFrame({
+            'country_code': self.countries,
+            'base_index': base,
+            'mean_index': finals.mean(axis=0),
+            **{f'p{int(q * 100):02d}': values for q, values in zip(QUANTILES, quantiles)},
+            'prob_decline': (finals < base).mean(axis=0),
+            'prob_bullish': (labels == 1).mean(axis=0),
+            'prob_neutral': (labels == 0).mean(axis=0),
+            'prob_cautious': (labels == -1).mean(axis=0),
+        })
+        result.insert(1, 'paths', paths)
+        return result
+
+
+def run_scenarios(scenarios=None, paths=PATHS, horizon=HORIZON, method='bootstrap', seed=0, engine=None):
+    """
+    Runs every named scenario with the same random draws and returns one long frame.
+    """
+    engine = engine or ScenarioEngine()
+    scenarios = default_scenarios() if scenarios is None else scenarios
+    results = [engine.run(scenario, paths, horizon, method, seed).assign(scenario=name) for name, scenario in scenarios.items()]
+    return pd.concat(results, ignore_index=True)
+
+
+def main(paths=PATHS, horizon=HORIZON, method='bootstrap'):
+    results = run_scenarios(paths=paths, horizon=horizon, method=method)
+    save_frame(results, 'scenario_outlook')
+    columns = ['scenario', 'country_code', 'base_index', 'p05', 'p50', 'p95', 'prob_decline', 'prob_bullish', 'prob_cautious']
+    print(results[columns].to_string(index=False, float_format=lambda value: f'{value:.3f}'))
+
+
+if __name__ == "__main__":
+    main()
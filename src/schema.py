@@ -0,0 +1,97 @@
+import json
+
+import pandas as pd
+
+from gdelt import TONE_FEATURES
+from registry import load_registry
+from sentiment import SENTIMENT_FEATURES
+from storage import load_frame, read_columns, save_frame
+
+# Typed description of a featured frame's columns: which country and asset each
+# column belongs to and what kind of feature it is. Built once when the frame is
+# constructed and stored next to it as '<artifact>_schema'.
+
+KINDS = ('level', 'return', 'volatility', 'macro', 'news')
+NEWS_FEATURES = frozenset([*TONE_FEATURES.values(), *SENTIMENT_FEATURES.values()])
+
+
+def classify_column(column, registry):
+    """
+    Returns (country, asset, asset_class, kind, feature) for one featured-frame column,
+    or None when the column belongs to no registered market.
+    """
+    if isinstance(column, tuple):
+        indicator, country_name = column
+        country = registry.by_name.get(country_name)
+        if country is None:
+            return None
+        # Daily news aggregates are index inputs; release-dated macro series are not
+        kind = 'news' if indicator in NEWS_FEATURES else 'macro'
+        return country.code, indicator, kind, kind, indicator
+
+    # Derived features are named '<ticker>_<feature>'; tickers never contain '_'
+    asset, _, feature = str(column).partition('_')
+    code = registry.ticker_country.get(asset)
+    if code is None:
+        return None
+    country = registry.by_code[code]
+    asset_class = 'index' if asset == country.index else 'currency' if asset == country.currency else 'stock'
+    if not feature:
+        kind = 'level'
+    elif feature.startswith('return'):
+        kind = 'return'
+    else:
+        kind = 'volatility'
+    return code, asset, asset_class, kind, feature or 'level'
+
+
+class FeatureSchema:
+    """
+    Column -> (country, asset, asset class, kind) table with a precomputed lookup, so
+    selecting a country's features is a dict access instead of a scan over column names.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._lookup = {}
+        self._position = {}
+        for position, row in enumerate(table.itertuples(index=False)):
+            self._lookup.setdefault((row.country, row.asset_class, row.kind), []).append(row.column)
+            self._position[row.column] = position
+
+    @classmethod
+    def build(cls, columns, registry=None):
+        registry = registry or load_registry()
+        rows = []
+        for column in columns:
+            info = classify_column(column, registry)
+            if info is not None:
+                rows.append((column, *info))
+        return cls(pd.DataFrame(rows, columns=['column', 'country', 'asset', 'asset_class', 'kind', 'feature']))
+
+    def columns(self, country, asset_classes=('index', 'currency', 'news'), kinds=('level', 'volatility', 'news')):
+        """
+        Columns of one country restricted to the given asset classes and feature kinds,
+        in frame order; the defaults are the stability index inputs.
+        """
+        selected = [column for asset_class in asset_classes for kind in kinds for column in self._lookup.get((country, asset_class, kind), [])]
+        return sorted(selected, key=self._position.__getitem__)
+
+    def save(self, name):
+        table = self.table.copy()
+        table['column'] = [json.dumps(list(column) if isinstance(column, tuple) else column) for column in table['column']]
+        save_frame(table, f'{name}_schema')
+
+    @classmethod
+    def load(cls, name):
+        """
+        Loads the schema stored next to an artifact, building it from the artifact's
+        columns when none was stored.
+        """
+        try:
+            table = load_frame(f'{name}_schema')
+        except FileNotFoundError:
+            return cls.build(read_columns(name))
+        decoded = (json.loads(column) for column in table['column'])
+        table['column'] = [tuple(column) if isinstance(column, list) else column for column in decoded]
+        return cls(table)
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from profiling import span
+from registry import load_registry
+from storage import DATA_DIR
+
+# Headline sentiment features. Texts are deduplicated and looked up by content hash
+# in an on-disk SQLite cache (per scorer), so a re-run never rescores a headline;
+# only the misses are scored, in fixed-size batches spread over a worker pool.
+# Scores in [-1, 1] are averaged per country and day. The default scorer is a
+# small finance lexicon that runs offline; FinBERT is used when requested and
+# transformers is installed.
+
+BATCH_SIZE = 64
+CACHE_NAME = 'sentiment_cache.sqlite'
+SENTIMENT_FEATURES = {'mean': 'News sentiment (mean)', 'negative_share': 'News sentiment (negative share)', 'headlines': 'News headlines'}
+
+# A compact finance word list in the spirit of Loughran-McDonald
+POSITIVE_WORDS = frozenset("""
+    gain gains gained rise rises rose rising rally rallies rallied surge surges surged jump jumps jumped
+    growth grow grows grew expand expands expansion record strong stronger strength robust improve improves
+    improved improvement recover recovers recovered recovery upgrade upgrades upgraded beat beats outperform
+    profit profits profitable boost boosts boosted optimism optimistic stable stability easing eases eased
+    inflow inflows rebound rebounds rebounded high highs positive opportunity success successful
+""".split())
+NEGATIVE_WORDS = frozenset("""
+    loss losses lose loses lost fall falls fell falling drop drops dropped decline declines declined slump
+    slumps slumped plunge plunges plunged crash crashes crashed weak weaker weakness downgrade downgrades
+    downgraded miss misses missed default defaults defaulted crisis risk risks risky volatile volatility
+    inflation recession deficit debt outflow outflows sanctions protest protests strike strikes unrest
+    uncertainty concern concerns fear fears warning warns warned cut cuts low lows negative fraud probe
+""".split())
+NEGATIONS = frozenset({'not', 'no', 'never', 'without'})
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+def text_hash(text):
+    """
+    Cache key of a text: SHA-256 of its whitespace-normalized form.
+    """
+    return hashlib.sha256(' '.join(str(text).split()).encode('utf-8')).hexdigest()
+
+
+class LexiconScorer:
+    """
+    (positive - negative) / (positive + negative) word counts; a negation flips the next word.
+    """
+
+    name = 'lexicon-v1'
+
+    def __init__(self, positive=POSITIVE_WORDS, negative=NEGATIVE_WORDS):
+        self.positive = frozenset(positive)
+        self.negative = frozenset(negative)
+
+    def score(self, texts):
+        scores = np.zeros(len(texts))
+        for i, text in enumerate(texts):
+            positive = negative = 0
+            flip = False
+            for token in _TOKEN.findall(str(text).lower()):
+                if token in NEGATIONS or token.endswith("n't"):
+                    flip = True
+                    continue
+                polarity = (token in self.positive) - (token in self.negative)
+                if flip:
+                    polarity = -polarity
+                    flip = False
+                positive += polarity > 0
+                negative += polarity < 0
+            if positive + negative:
+                scores[i] = (positive - negative) / (positive + negative)
+        return scores
+
+
+class FinBertScorer:
+    """
+    P(positive) - P(negative) from FinBERT, one batched pipeline call per batch.
+    Requires transformers (and a backend such as torch); the model loads on first use.
+    """
+
+    def __init__(self, model='ProsusAI/finbert', batch_size=BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f'finbert:{model}'
+        self._pipeline = None
+
+    def __getstate__(self):
+        # Workers load their own copy of the model
+        return {**self.__dict__, '_pipeline': None}
+
+    def score(self, texts):
+        if self._pipeline is None:
+            from transformers import pipeline
+            self._pipeline = pipeline('sentiment-analysis', model=self.model, top_k=None)
+        results = self._pipeline([str(text) for text in texts], batch_size=self.batch_size, truncation=True)
+        return np.array([
+            sum(item['score'] for item in labels if item['label'].lower() == 'positive')
+            - sum(item['score'] for item in labels if item['label'].lower() == 'negative')
+            for labels in results
+        ])
+
+
+class ScoreCache:
+    """
+    On-disk (text hash, scorer) -> score table.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, CACHE_NAME)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS scores (hash TEXT, scorer TEXT, score REAL, PRIMARY KEY (hash, scorer))')
+
+    def get(self, hashes, scorer_name, chunk=500):
+        found = {}
+        for start in range(0, len(hashes), chunk):
+            part = hashes[start:start + chunk]
+            rows = self.connection.execute(
+                f"SELECT hash, score FROM scores WHERE scorer = ? AND hash IN ({', '.join('?' * len(part))})",
+                [scorer_name, *part],
+            )
+            found.update(rows)
+        return found
+
+    def put(self, scores, scorer_name):
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?)', [(key, scorer_name, float(value)) for key, value in scores.items()])
+
+    def close(self):
+        self.connection.close()
+
+
+_worker_scorer = None
+
+
+def _init_worker(scorer):
+    # Process workers keep one scorer (and the model it loads) for all their batches
+    global _worker_scorer
+    _worker_scorer = scorer
+
+
+def _score_batch(texts, scorer=None):
+    # Worker: one batch through the scorer
+    return (scorer or _worker_scorer).score(texts)
+
+
+def score_texts(texts, scorer=None, cache=None, batch_size=BATCH_SIZE, workers=None, executor='process'):
+    """
+    Scores texts in [-1, 1], scoring each distinct uncached text once in batches of
+    batch_size on a process or thread pool (workers=1 runs in-process). Each process
+    worker receives the scorer once, so a model is loaded once per worker.
+    """
+    scorer = scorer or LexiconScorer()
+    hashes = [text_hash(text) for text in texts]
+    unique = dict(zip(hashes, texts))
+    known = cache.get(list(unique), scorer.name) if cache is not None else {}
+    missing = [key for key in unique if key not in known]
+
+    with span('sentiment.score', texts=len(texts), unique=len(unique)) as current:
+        current.hit(len(unique) - len(missing))
+        current.miss(len(missing))
+        batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+        if workers == 1 or len(batches) <= 1:
+            results = [_score_batch([unique[key] for key in batch], scorer) for batch in batches]
+        elif executor == 'process':
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(scorer,)) as pool:
+                futures = [pool.submit(_score_batch, [unique[key] for key in batch]) for batch in batches]
+                results = [future.result() for future in futures]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_score_batch, [unique[key] for key in batch], scorer) for batch in batches]
+                results = [future.result() for future in futures]
+
+    scored = {key: float(value) for batch, values in zip(batches, results) for key, value in zip(batch, values)}
+    if cache is not None and scored:
+        cache.put(scored, scorer.name)
+    known.update(scored)
+    return np.array([known[key] for key in hashes], dtype=float)
+
+
+def load_headlines(path):
+    """
+    Reads a headlines export (CSV with date, country code and text columns) from any news feed.
+    """
+    headlines = pd.read_csv(path, parse_dates=['date'])
+    missing = {'date', 'country', 'text'} - set(headlines.columns)
+    if missing:
+        raise ValueError(f"Headlines file {path} lacks columns: {', '.join(sorted(missing))}")
+    return headlines[['date', 'country', 'text']]
+
+
+def daily_sentiment(headlines, scores, registry=None):
+    """
+    Wide date x (feature, country name) frame of the mean score, share of negative
+    headlines and headline count per country and day (headlines: date, country, text).
+    """
+    registry = registry or load_registry()
+    scored = pd.DataFrame({
+        'date': pd.to_datetime(headlines['date']).dt.normalize().to_numpy(),
+        'country': headlines['country'].to_numpy(),
+        'score': scores,
+        'negative': scores < 0,
+    })
+    daily = scored.groupby(['date', 'country']).agg(mean=('score', 'mean'), negative_share=('negative', 'mean'), headlines=('score', 'size'))
+    wide = daily.unstack('country')
+    wide.columns = pd.Index([(SENTIMENT_FEATURES[stat], registry.by_code[code].name) for stat, code in wide.columns], tupleize_cols=False)
+    wide.index.name = None
+    return wide
+
+
+def sentiment_features(headlines, scorer=None, batch_size=BATCH_SIZE, workers=None, executor='process', cache_path=None, registry=None):
+    """
+    Scores a (date, country, text) headlines frame through the cache and returns the daily features.
+    """
+    cache = ScoreCache(cache_path)
+    try:
+        scores = score_texts(list(headlines['text']), scorer, cache, batch_size, workers, executor)
+    finally:
+        cache.close()
+    return daily_sentiment(headlines, scores, registry)
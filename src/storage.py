@@ -0,0 +1,214 @@
+import ast
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from profiling import span
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# Schema metadata key holding the original (possibly tuple) column labels.
+COLUMNS_KEY = b'emsi.columns'
+
+# Read options matching how each artifact was written before the Parquet store,
+# so an existing data/ directory of CSVs keeps loading.
+LEGACY_CSV_OPTIONS = {
+    'unified_dataset': {'index_col': 0, 'parse_dates': True},
+    'featured_dataset': {'index_col': 0, 'parse_dates': True},
+    'stability_index': {'index_col': 0, 'parse_dates': True},
+    'full_stability_index': {'index_col': 0, 'parse_dates': True},
+}
+
+# Arrow columns already read in this process, by path, while enabled (see enable_table_cache)
+TABLE_CACHE_BYTES = 512 * 2 ** 20
+_TABLE_CACHE = None
+_TABLE_CACHE_LIMIT = TABLE_CACHE_BYTES
+_TABLE_CACHE_LOCK = threading.Lock()
+
+
+def _reset_table_cache_lock():
+    # Workers forked while a stage thread was reading must not inherit the lock held
+    global _TABLE_CACHE_LOCK
+    _TABLE_CACHE_LOCK = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_table_cache_lock)
+
+
+def artifact_path(name, data_dir=None):
+    """
+    Returns the Parquet path of a named artifact in the data directory.
+    """
+    return os.path.join(data_dir or DATA_DIR, f'{name}.parquet')
+
+
+def _column_key(label):
+    # Parquet only accepts string field names; tuples are joined with a separator
+    # that cannot appear in a ticker or World Bank indicator name.
+    if isinstance(label, tuple):
+        return '\x1f'.join(str(part) for part in label)
+    return str(label)
+
+
+def _encode_label(label):
+    return list(label) if isinstance(label, tuple) else label
+
+
+def _decode_label(label):
+    return tuple(label) if isinstance(label, list) else label
+
+
+def _parse_legacy_label(label):
+    # Old CSVs stringified tuple headers, e.g. "('GDP growth (annual %)', 'Brazil')".
+    if isinstance(label, str) and label.startswith("('") and label.endswith("')"):
+        return ast.literal_eval(label)
+    return label
+
+
+def save_frame(df, name, data_dir=None):
+    """
+    Saves a DataFrame as a typed Parquet artifact, keeping the real column labels.
+    """
+    data_dir = data_dir or DATA_DIR
+    os.makedirs(data_dir, exist_ok=True)
+    path = artifact_path(name, data_dir)
+
+    labels = list(df.columns)
+    keys = [_column_key(label) for label in labels]
+    if len(set(keys)) != len(keys):
+        raise ValueError(f"Column labels of '{name}' are not unique once encoded")
+
+    with span('write', artifact=name) as current:
+        current.rows_in = len(df)
+        encoded = df.copy(deep=False)
+        encoded.columns = keys
+        table = pa.Table.from_pandas(encoded, preserve_index=not isinstance(df.index, pd.RangeIndex))
+        metadata = dict(table.schema.metadata or {})
+        metadata[COLUMNS_KEY] = json.dumps([[key, _encode_label(label)] for key, label in zip(keys, labels)]).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), path)
+        current.set(file_bytes=os.path.getsize(path))
+    return path
+
+
+def read_columns(name, data_dir=None):
+    """
+    Returns the column labels of an artifact without loading any data.
+    """
+    path = artifact_path(name, data_dir)
+    if os.path.exists(path):
+        metadata = pq.read_schema(path).metadata or {}
+        if COLUMNS_KEY in metadata:
+            return [_decode_label(label) for _, label in json.loads(metadata[COLUMNS_KEY])]
+        return [field for field in pq.read_schema(path).names if not field.startswith('__index_level_')]
+    return list(_read_legacy_csv(name, data_dir, nrows=0).columns)
+
+
+def _cast_floats(table, dtype, label_for):
+    # Tuple-labelled (macro) columns keep their precision; only the market block is narrowed
+    target = pa.from_numpy_dtype(np.dtype(dtype))
+    fields = [
+        field.with_type(target) if pa.types.is_floating(field.type) and field.name in label_for and not isinstance(label_for[field.name], tuple) else field
+        for field in table.schema
+    ]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def enable_table_cache(enabled=True, max_bytes=TABLE_CACHE_BYTES):
+    """
+    Keeps the Arrow columns read from each artifact in memory, so stages run in one
+    process share reads. Only requested columns are read and kept; once the cache holds
+    more than max_bytes the least recently used artifacts are dropped. Entries are keyed
+    by file mtime and size, so a rewritten artifact is read again. Arrow tables are
+    immutable; every caller still gets its own frame.
+    """
+    global _TABLE_CACHE, _TABLE_CACHE_LIMIT
+    with _TABLE_CACHE_LOCK:
+        _TABLE_CACHE = OrderedDict() if enabled else None
+        _TABLE_CACHE_LIMIT = max_bytes
+
+
+def _read_table(path, keys, current):
+    if _TABLE_CACHE is None:
+        return pq.read_table(path, columns=keys, use_pandas_metadata=True)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    schema = pq.read_schema(path)
+    index_columns = [column for column in (schema.pandas_metadata or {}).get('index_columns', []) if isinstance(column, str)]
+    wanted = list(schema.names) if keys is None else list(keys) + [column for column in index_columns if column not in keys]
+
+    with _TABLE_CACHE_LOCK:
+        cached = _TABLE_CACHE.get(path)
+    table = cached[1] if cached is not None and cached[0] == stamp else None
+    missing = [column for column in wanted if table is None or column not in table.column_names]
+    if missing:
+        current.miss()
+        part = pq.read_table(path, columns=missing)
+        if table is None:
+            table = part
+        else:
+            for name in part.column_names:
+                table = table.append_column(part.field(name), part.column(name))
+    else:
+        current.hit()
+
+    with _TABLE_CACHE_LOCK:
+        if _TABLE_CACHE is not None:
+            _TABLE_CACHE[path] = (stamp, table)
+            _TABLE_CACHE.move_to_end(path)
+            while len(_TABLE_CACHE) > 1 and sum(entry[1].nbytes for entry in _TABLE_CACHE.values()) > _TABLE_CACHE_LIMIT:
+                _TABLE_CACHE.popitem(last=False)
+    return table.select(wanted)
+
+
+def load_frame(name, columns=None, data_dir=None, float_dtype=None):
+    """
+    Loads a named artifact, reading only the requested columns when given.
+    With float_dtype (e.g. 'float32') market float columns are narrowed while still in
+    Arrow, so the wider pandas frame is never built.
+    Falls back to the legacy CSV file when no Parquet artifact exists yet.
+    """
+    path = artifact_path(name, data_dir)
+    if not os.path.exists(path):
+        df = _read_legacy_csv(name, data_dir)
+        df = df if columns is None else df[list(columns)]
+        if float_dtype is not None:
+            narrowed = {col: float_dtype for col in df.columns if not isinstance(col, tuple) and pd.api.types.is_float_dtype(df[col])}
+            df = df.astype(narrowed)
+        return df
+
+    metadata = pq.read_schema(path).metadata or {}
+    pairs = [(key, _decode_label(label)) for key, label in json.loads(metadata.get(COLUMNS_KEY, b'[]'))]
+    key_for = {label: key for key, label in pairs}
+    label_for = {key: label for key, label in pairs}
+
+    read_keys = None
+    if columns is not None:
+        missing = [label for label in columns if label not in key_for]
+        if missing:
+            raise KeyError(f"{missing} not found in artifact '{name}'")
+        read_keys = [key_for[label] for label in columns]
+
+    with span('read', artifact=name) as current:
+        table = _read_table(path, read_keys, current)
+        if float_dtype is not None:
+            table = _cast_floats(table, float_dtype, label_for)
+        df = table.to_pandas()
+        df.columns = [label_for.get(key, key) for key in df.columns]
+        current.rows_out = len(df)
+    return df
+
+
+def _read_legacy_csv(name, data_dir=None, nrows=None):
+    path = os.path.join(data_dir or DATA_DIR, f'{name}.csv')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No Parquet or CSV artifact named '{name}' in {data_dir or DATA_DIR}")
+    df = pd.read_csv(path, nrows=nrows, **LEGACY_CSV_OPTIONS.get(name, {}))
+    df.columns = [_parse_legacy_label(col) for col in df.columns]
+    return df
@@ -0,0 +1,258 @@
+import asyncio
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from correlation import SCREENER_THRESHOLD, categorize, correlate_universe
+from features import ANNUALIZATION, feature_window
+from incremental_index import IncrementalIndex
+from model import calculate_outlook
+from panel import is_macro
+from profiling import traced
+from providers import LiveProvider
+from registry import load_registry
+from storage import load_frame, read_columns, save_frame
+
+# Intraday stability readings. Quotes arrive from any async iterable (a replay file,
+# a polling loop over a provider) through an asyncio queue. Each quote updates its
+# ticker's level and rolling-volatility features in O(1): the previous window-1 daily
+# returns are summed once at start-up and only the live return against the last
+# close changes. Country readings use the persisted scaler and loadings of the daily
+# index engine without folding intraday values into that state, and the outlook and
+# screener correlations are republished every `cadence` seconds of quote time.
+
+CADENCE = 60.0
+POLL_INTERVAL = 30.0
+QUEUE_SIZE = 10000
+SCREEN_WINDOW = 30
+OUTLOOK_HISTORY = 60
+
+Quote = namedtuple('Quote', ['time', 'ticker', 'price'])
+
+
+class ReplaySource:
+    """
+    Replays quotes (time, ticker, price) in time order; `speed` paces them at that
+    multiple of real time, None replays as fast as they are consumed.
+    """
+
+    def __init__(self, quotes, speed=None):
+        self.quotes = quotes.sort_values('time', kind='stable')
+        self.speed = speed
+
+    @classmethod
+    def from_csv(cls, path, speed=None):
+        return cls(pd.read_csv(path, parse_dates=['time']), speed)
+
+    @classmethod
+    def from_prices(cls, prices, speed=None):
+        """
+        Replays a wide time x ticker price frame, one quote per non-missing cell.
+        """
+        quotes = prices.rename_axis('time').reset_index().melt(id_vars='time', var_name='ticker', value_name='price')
+        return cls(quotes.dropna(subset=['price']), speed)
+
+    async def __aiter__(self):
+        previous = None
+        for time, ticker, price in zip(self.quotes['time'], self.quotes['ticker'], self.quotes['price']):
+            if self.speed and previous is not None and time > previous:
+                await asyncio.sleep((time - previous).total_seconds() / self.speed)
+            previous = time
+            yield Quote(pd.Timestamp(time), ticker, float(price))
+
+
+class PollingSource:
+    """
+    Polls `fetch(tickers) -> {ticker: price}` every `interval` seconds in a worker
+    thread (e.g. LiveProvider().fetch_quotes) and yields the prices as quotes.
+    """
+
+    def __init__(self, fetch, tickers, interval=POLL_INTERVAL):
+        self.fetch = fetch
+        self.tickers = list(tickers)
+        self.interval = interval
+
+    async def __aiter__(self):
+        while True:
+            prices = await asyncio.to_thread(self.fetch, self.tickers)
+            now = pd.Timestamp.now()
+            for ticker, price in prices.items():
+                if np.isfinite(price):
+                    yield Quote(now, ticker, float(price))
+            await asyncio.sleep(self.interval)
+
+
+class LiveStability:
+    """
+    Intraday index, outlook and screener state built on the published daily artifacts.
+    """
+
+    def __init__(self, registry=None, screen_window=SCREEN_WINDOW, threshold=SCREENER_THRESHOLD, outlook_history=OUTLOOK_HISTORY, data_dir=None):
+        self.registry = registry or load_registry()
+        self.screen_window = screen_window
+        self.threshold = threshold
+        self.data_dir = data_dir
+        self.engines = {}
+        for code in self.registry.codes:
+            engine = IncrementalIndex.load(code, data_dir=data_dir)
+            if engine is not None:
+                self.engines[code] = engine
+        if not self.engines:
+            raise FileNotFoundError("No saved index state; run the backend before streaming")
+
+        # Each quote touches the (country, position, window) slots its ticker feeds
+        self.rows = {code: engine.last_row.copy() for code, engine in self.engines.items()}
+        self.slots = {}
+        windows = {screen_window}
+        for code, engine in self.engines.items():
+            for position, column in enumerate(engine.columns):
+                asset, _, feature = str(column).partition('_')
+                window = None if not feature else feature_window(feature)
+                if is_macro(column) or (feature and window is None):
+                    continue  # features the stream cannot recompute (news aggregates too) keep their last daily value
+                self.slots.setdefault(asset, []).append((code, position, window))
+                windows.add(window or 1)
+
+        available = set(read_columns('featured_dataset', data_dir))
+        stocks = [ticker for ticker in self.registry.stock_tickers if ticker in available]
+        tickers = [ticker for ticker in dict.fromkeys(list(self.slots) + stocks) if ticker in available]
+        levels = load_frame('featured_dataset', columns=tickers, data_dir=data_dir).astype(float).ffill()
+        levels = levels.iloc[-(max(windows) + 1):]
+        returns = levels.pct_change()
+        self.close = levels.iloc[-1].to_dict()
+
+        # Sums of the last window-1 daily returns per (ticker, window)
+        self.sums = {}
+        for asset, slots in self.slots.items():
+            for _, _, window in slots:
+                if window and (asset, window) not in self.sums and asset in returns.columns:
+                    past = returns[asset].iloc[len(returns) - (window - 1):].dropna().to_numpy()
+                    self.sums[(asset, window)] = (len(past), past.sum(), (past ** 2).sum())
+
+        history = load_frame('full_stability_index', data_dir=data_dir)
+        self.history = {code: history[code].dropna().iloc[-outlook_history:] for code in self.engines}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            changes = history[list(self.engines)].pct_change()
+        self.index_changes = changes.iloc[-(screen_window - 1):]
+        stock_returns = load_frame('stock_returns', data_dir=data_dir)
+        self.stock_returns = stock_returns.iloc[-(screen_window - 1):]
+
+        self.prices = {}
+        self.quotes = {code: 0 for code in self.engines}
+        self.time = None
+
+    def on_quote(self, quote):
+        """
+        Folds one quote into the live feature rows of the countries its ticker belongs to.
+        """
+        if quote.ticker not in self.close and quote.ticker not in self.slots:
+            return
+        self.prices[quote.ticker] = quote.price
+        self.time = quote.time if self.time is None else max(self.time, quote.time)
+        close = self.close.get(quote.ticker)
+        live_return = quote.price / close - 1 if close else np.nan
+        slots = self.slots.get(quote.ticker, ())
+        for code in dict.fromkeys(code for code, _, _ in slots):
+            self.quotes[code] += 1
+        for code, position, window in slots:
+            if window is None:
+                self.rows[code][position] = quote.price
+            elif np.isfinite(live_return) and (quote.ticker, window) in self.sums:
+                count, total, squares = self.sums[(quote.ticker, window)]
+                count, total, squares = count + 1, total + live_return, squares + live_return ** 2
+                if count > 1:
+                    self.rows[code][position] = np.sqrt(max(squares - total ** 2 / count, 0.0) / (count - 1)) * ANNUALIZATION
+
+    def readings(self):
+        """
+        Live index value, change against the last published close and outlook per country.
+        """
+        rows = []
+        for code, engine in self.engines.items():
+            time = self.time or engine.last_date
+            value = float(engine.score(self.rows[code]))
+            history = self.history[code]
+            series = pd.concat([history, pd.Series([value], index=[time])])
+            rows.append({
+                'country_code': code,
+                'time': time,
+                'stability_index': value,
+                'index_change': value / history.iloc[-1] - 1 if len(history) else np.nan,
+                'outlook': calculate_outlook(series),
+                'quotes': self.quotes[code],
+            })
+        return pd.DataFrame(rows)
+
+    def screener(self, readings):
+        """
+        Screener correlations over the last `screen_window` days, today's live returns included.
+        """
+        time = readings['time'].iloc[0]
+        live_returns = {ticker: self.prices[ticker] / self.close[ticker] - 1 for ticker in self.stock_returns.columns if ticker in self.prices and self.close.get(ticker)}
+        returns = pd.concat([self.stock_returns, pd.DataFrame(live_returns, index=[time], columns=self.stock_returns.columns)])
+        changes = pd.concat([self.index_changes, readings.set_index('time').pivot(columns='country_code', values='index_change').reindex(columns=self.index_changes.columns)])
+        stats = correlate_universe(returns, changes, self.registry.stock_country, self.screen_window)
+        stats['category'] = categorize(stats['correlation'], self.threshold)
+        return stats.reset_index()
+
+    @traced('stream.snapshot')
+    def snapshot(self):
+        readings = self.readings()
+        return readings, self.screener(readings)
+
+    def publish(self, readings, screener):
+        save_frame(readings, 'live_index', self.data_dir)
+        save_frame(screener, 'live_screener', self.data_dir)
+        print(f"[stream] {readings['time'].iloc[0]}: " + ", ".join(f"{row.country_code} {row.stability_index:.3f} ({row.outlook})" for row in readings.itertuples()))
+
+
+async def run(source, live, cadence=CADENCE, publish=None):
+    """
+    Ingests quotes from `source` through a bounded queue and republishes readings every
+    `cadence` seconds of quote time, plus once when the source ends. Returns the number
+    of snapshots published.
+    """
+    publish = publish or live.publish
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    async def ingest():
+        try:
+            async for quote in source:
+                await queue.put(quote)
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(ingest())
+    step = pd.Timedelta(seconds=cadence)
+    next_publish, published = None, 0
+    while (quote := await queue.get()) is not None:
+        live.on_quote(quote)
+        if next_publish is None:
+            next_publish = quote.time + step
+        elif quote.time >= next_publish:
+            await asyncio.to_thread(publish, *live.snapshot())
+            published += 1
+            next_publish = quote.time + step
+    await producer
+    if live.time is not None:
+        await asyncio.to_thread(publish, *live.snapshot())
+        published += 1
+    return published
+
+
+def main(replay_path=None, cadence=CADENCE, speed=None):
+    """
+    Streams from a replay CSV (time, ticker, price) when given, otherwise polls live quotes.
+    """
+    live = LiveStability()
+    if replay_path:
+        source = ReplaySource.from_csv(replay_path, speed)
+    else:
+        source = PollingSource(LiveProvider().fetch_quotes, list(live.close))
+    asyncio.run(run(source, live, cadence))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
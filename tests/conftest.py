@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules under src/ (and the benchmark data generator) import each other by bare name
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# Keep test runs out of the profile log
+os.environ['EMSI_PROFILE'] = 'off'
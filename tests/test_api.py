@@ -0,0 +1,41 @@
+import json
+import os
+
+import pandas as pd
+
+from api import IndexApi
+from storage import artifact_path, save_frame
+
+
+def publish(data_dir, outlook):
+    dates = pd.date_range('2024-01-01', periods=5)
+    save_frame(pd.DataFrame({'BRA': [1.0, 1.1, 1.2, 1.1, 1.0]}, index=dates), 'full_stability_index', data_dir)
+    save_frame(pd.DataFrame({'country_code': ['BRA'], 'date': ['2024-01-05'], 'stability_index': [1.0], 'outlook': [outlook]}), 'index_data', data_dir)
+    # Distinct versions even when both writes land in the same clock tick
+    path = artifact_path('index_data', data_dir)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_response_of_a_replaced_snapshot_is_not_cached(tmp_path):
+    data_dir = str(tmp_path)
+    publish(data_dir, 'Neutral')
+    api = IndexApi(data_dir, reload_interval=0)
+
+    # The backend republishes (and a concurrent request reloads) while this request is computed
+    old_store = api.store
+    compute = old_store.outlook
+
+    def outlook_during_reload():
+        payload = compute()
+        publish(data_dir, 'Cautious')
+        api.refresh()
+        return payload
+
+    old_store.outlook = outlook_during_reload
+    status, body, _ = api.respond('/outlook')
+    assert status == 200 and json.loads(body)[0]['outlook'] == 'Neutral'
+    assert api.store is not old_store
+
+    status, body, _ = api.respond('/outlook')
+    assert json.loads(body)[0]['outlook'] == 'Cautious'
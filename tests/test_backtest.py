@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import walk_forward_index
+from features import add_volatility_features
+from schema import FeatureSchema
+from synthetic import make_market, make_registry
+
+
+@pytest.fixture(scope='module')
+def markets():
+    registry = make_registry(2, 2)
+    market = make_market(registry, 2)
+    return registry, market
+
+
+def walk_forward(registry, market, burn_in=120):
+    featured = add_volatility_features(market, registry.market_tickers)
+    schema = FeatureSchema.build(featured.columns, registry)
+    frames = {country.code: featured[schema.columns(country.code)] for country in registry.countries}
+    anchors = {country.code: country.index for country in registry.countries}
+    return walk_forward_index(frames, anchors, burn_in)
+
+
+def test_walk_forward_values_do_not_depend_on_later_data(markets):
+    registry, market = markets
+    index = walk_forward(registry, market)
+    cutoff = index.index[len(index) // 2]
+
+    # Rewrite every market series after the cutoff
+    rng = np.random.default_rng(7)
+    perturbed = market.copy()
+    later = perturbed.index > cutoff
+    perturbed.loc[later] = perturbed.loc[later] * rng.uniform(0.5, 1.5, size=perturbed.loc[later].shape)
+    changed = walk_forward(registry, perturbed)
+
+    pd.testing.assert_frame_equal(changed.loc[:cutoff], index.loc[:cutoff])
+    assert not np.allclose(changed.loc[cutoff:].iloc[1:], index.loc[cutoff:].iloc[1:])
+
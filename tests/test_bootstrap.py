@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bootstrap import block_indices, bootstrap_country
+from features import add_volatility_features
+from schema import FeatureSchema
+from synthetic import make_market, make_registry
+
+
+@pytest.fixture(scope='module')
+def country():
+    registry = make_registry(1, 2)
+    featured = add_volatility_features(make_market(registry, 2), registry.market_tickers)
+    code = registry.codes[0]
+    return featured[FeatureSchema.build(featured.columns, registry).columns(code)], registry.by_code[code].index
+
+
+def test_blocks_are_consecutive_rows_of_the_block_length():
+    indices = block_indices(103, 20, 50, np.random.default_rng(3))
+
+    assert indices.shape == (50, 103)
+    assert indices.min() >= 0 and indices.max() < 103
+    # Six blocks per sample: five of 20 rows and a final one cut to 3, each a run of consecutive rows
+    blocks = np.split(indices, range(20, 103, 20), axis=1)
+    assert [block.shape[1] for block in blocks] == [20] * 5 + [3]
+    for block in blocks:
+        assert (np.diff(block, axis=1) == 1).all()
+    # Block starts are drawn so a whole block fits in the series
+    assert blocks[0][:, 0].max() <= 103 - 20
+
+
+def test_intervals_contain_the_full_sample_fit(country):
+    frame, anchor = country
+    intervals, explained = bootstrap_country(frame, anchor, resamples=500, seed=11)
+
+    assert (intervals['lower'] <= intervals['loading']).all() and (intervals['loading'] <= intervals['upper']).all()
+    assert (intervals['std'] > 0).all()
+    row = explained.iloc[0]
+    assert row['lower'] <= row['explained_variance'] <= row['upper']
+
+    # Seeded: the same intervals again, whether the chunks run in-process or on a pool
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled, pooled_explained = bootstrap_country(frame, anchor, resamples=500, seed=11, pool=pool)
+    pd.testing.assert_frame_equal(pooled, intervals)
+    pd.testing.assert_frame_equal(pooled_explained, explained)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from correlation import correlation_matrix, returns_matrix, rolling_screener
+from synthetic import make_index_changes, make_market, make_registry
+
+
+def test_correlation_matrix_matches_pairwise_corr():
+    registry = make_registry(3, 4)
+    market = make_market(registry, 2)
+    returns = returns_matrix(market[registry.stock_tickers])
+    changes = make_index_changes(registry, market.index)
+    # Gaps on both sides, so every pair has its own set of complete dates
+    changes = changes.mask(np.random.default_rng(2).random(changes.shape) < 0.1)
+
+    correlations, counts = correlation_matrix(returns, changes)
+
+    for ticker in returns.columns:
+        for code in changes.columns:
+            pair = pd.concat([returns[ticker], changes[code]], axis=1, join='inner').dropna()
+            assert counts.loc[ticker, code] == len(pair)
+            np.testing.assert_allclose(correlations.loc[ticker, code], pair.corr().iloc[0, 1], atol=1e-10)
+
+
+def test_rolling_screener_flags_every_category_change():
+    registry = make_registry(2, 3)
+    market = make_market(registry, 1)
+    returns = returns_matrix(market[registry.stock_tickers])
+    changes = make_index_changes(registry, market.index)
+
+    correlations, categories, regime_changes = rolling_screener(returns, changes, registry.stock_country, windows=(30,), threshold=0.1)
+
+    labels = categories.to_numpy()
+    labelled = categories.notna().to_numpy()
+    expected = np.zeros(labels.shape, dtype=bool)
+    for t in range(1, len(labels)):
+        for j in range(labels.shape[1]):
+            expected[t, j] = labelled[t, j] and labelled[t - 1, j] and labels[t, j] != labels[t - 1, j]
+    assert (regime_changes.to_numpy() == expected).all()
+    # Moves into and out of Neutral are regime changes too
+    assert (regime_changes.to_numpy() & (labels == 'Neutral')).any()
+    assert set(np.unique(labels[np.isfinite(correlations.to_numpy())])) <= {'High-Momentum Play', 'Resilient Defender', 'Neutral'}
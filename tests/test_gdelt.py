@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from gdelt import SQLiteBackend, ToneStore, tone_features
+from synthetic import make_registry
+
+
+def make_events(fips, days, seed=0, per_day=20):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2000-01-03', periods=days)
+    rows = len(dates) * per_day
+    return pd.DataFrame({
+        'SQLDATE': rng.choice(dates.strftime('%Y%m%d').astype(int), size=rows),
+        'ActionGeo_CountryCode': rng.choice(list(fips) + ['XX'], size=rows),
+        'AvgTone': rng.normal(-1.0, 3.0, size=rows),
+    })
+
+
+def test_sqlite_aggregates_match_pandas():
+    events = make_events(['F0', 'F1'], 30)
+    backend = SQLiteBackend.from_events(events)
+
+    chunks = list(backend.daily_aggregates(['F0', 'F1'], '2000-01-01', '2000-12-31', chunk_size=7))
+    assert len(chunks) > 1
+    result = pd.concat(chunks).set_index(['country', 'day']).sort_index()
+
+    kept = events[events['ActionGeo_CountryCode'] != 'XX']
+    expected = kept.assign(squares=kept['AvgTone'] ** 2).groupby(['ActionGeo_CountryCode', 'SQLDATE']).agg(
+        events=('AvgTone', 'size'), tone_sum=('AvgTone', 'sum'), tone_squares=('squares', 'sum'))
+    assert (result['events'].to_numpy() == expected['events'].to_numpy()).all()
+    np.testing.assert_allclose(result['tone_sum'], expected['tone_sum'])
+    np.testing.assert_allclose(result['tone_squares'], expected['tone_squares'])
+
+
+def test_tone_store_refreshes_only_new_days(tmp_path):
+    registry = make_registry(2, 1)
+    countries = {code: f'F{i}' for i, code in enumerate(registry.codes)}
+    events = make_events(countries.values(), 40)
+    backend = SQLiteBackend.from_events(events)
+    store = ToneStore(data_dir=str(tmp_path))
+
+    assert store.refresh(countries, '2000-02-01', backend, '2000-01-01') > 0
+    assert store.refresh(countries, '2000-02-01', backend, '2000-01-01') == 0
+    store.refresh(countries, '2000-03-01', backend, '2000-01-01')
+
+    daily = ToneStore(data_dir=str(tmp_path)).daily(list(countries))
+    code = registry.codes[0]
+    tones = events[events['ActionGeo_CountryCode'] == countries[code]]
+    tones = tones[tones['SQLDATE'] < 20000301].groupby('SQLDATE')['AvgTone']
+    ours = daily[daily['country'] == code].set_index('date').sort_index()
+    np.testing.assert_allclose(ours['mean'], tones.mean().to_numpy())
+    np.testing.assert_allclose(ours['std'], tones.std().to_numpy())
+
+    wide = tone_features(daily, registry)
+    assert ('News tone (mean)', registry.by_code[code].name) in wide.columns
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from features import add_volatility_features
+from incremental_index import IncrementalIndex, extend_index
+from panel import ffill_trimmed
+from schema import FeatureSchema
+from synthetic import make_market, make_registry
+
+
+@pytest.fixture(scope='module')
+def country():
+    registry = make_registry(2, 2)
+    featured = add_volatility_features(make_market(registry, 3), registry.market_tickers)
+    code = registry.codes[0]
+    frame = featured[FeatureSchema.build(featured.columns, registry).columns(code)]
+    return code, registry.by_code[code].index, frame
+
+
+def test_fit_matches_scaler_and_pca(country):
+    _, anchor, frame = country
+    clean = ffill_trimmed(frame)
+    engine, index = IncrementalIndex.fit(clean, anchor)
+
+    scaled = StandardScaler().fit_transform(clean)
+    pca = PCA(n_components=1).fit(scaled)
+    sign = np.sign(pca.components_[0][clean.columns.get_loc(anchor)])
+    np.testing.assert_allclose(engine.loadings.to_numpy(), sign * pca.components_[0], atol=1e-10)
+    np.testing.assert_allclose(index.to_numpy(), sign * pca.transform(scaled)[:, 0], atol=1e-8)
+    assert engine.loadings[anchor] > 0
+
+
+def test_constant_feature_is_scaled_like_standard_scaler(country):
+    _, anchor, frame = country
+    clean = ffill_trimmed(frame).assign(flat=101.3)
+    engine, index = IncrementalIndex.fit(clean, anchor)
+
+    scaled = StandardScaler().fit_transform(clean)
+    pca = PCA(n_components=1).fit(scaled)
+    sign = np.sign(pca.components_[0][clean.columns.get_loc(anchor)])
+    assert np.isfinite(index).all() and engine.scale[-1] == 1.0
+    np.testing.assert_allclose(index.to_numpy(), sign * pca.transform(scaled)[:, 0], atol=1e-8)
+
+
+def test_update_continues_the_fit(country):
+    _, anchor, frame = country
+    clean = ffill_trimmed(frame)
+    engine, _ = IncrementalIndex.fit(clean.iloc[:-60], anchor)
+    restored = IncrementalIndex.from_dict(engine.to_dict())
+
+    values = engine.update(clean)
+    assert len(values) == 60 and values.index.equals(clean.index[-60:])
+    # Running moments after the update equal the batch moments of the whole history
+    np.testing.assert_allclose(engine.mean, clean.to_numpy().mean(axis=0))
+    np.testing.assert_allclose(engine.scale, clean.to_numpy().std(axis=0))
+    np.testing.assert_allclose(values.iloc[-1], engine.score(clean.iloc[-1].to_numpy()))
+    # The state round-trips through its dict form
+    np.testing.assert_allclose(restored.update(clean).to_numpy(), values.to_numpy())
+
+
+def test_extend_index_appends_without_rewriting(country, tmp_path):
+    code, anchor, frame = country
+    history, _ = extend_index(code, frame.iloc[:-30], anchor=anchor, data_dir=str(tmp_path))
+    extended, loadings = extend_index(code, frame, history, anchor=anchor, data_dir=str(tmp_path))
+
+    assert extended.iloc[:len(history)].equals(history)
+    assert len(extended) == len(history) + 30
+    assert IncrementalIndex.load(code, data_dir=str(tmp_path)).last_date == frame.index[-1]
+    assert list(loadings.index) == list(frame.columns)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from macro import release_frame, release_table
+from panel import MarketPanel
+
+
+def test_macro_value_is_visible_from_its_release_date():
+    gdp = 'GDP growth (annual %)'
+    cpi = 'Inflation, consumer prices (annual %)'
+    indicators = pd.DataFrame({gdp: [1.5, 2.5], cpi: [4.0, np.nan]},
+                              index=pd.MultiIndex.from_tuples([('Brazil', '2021'), ('Brazil', '2022')], names=['country', 'date']))
+    # An explicit vintage: the 2022 inflation print came out early
+    vintages = pd.DataFrame({'indicator': [cpi], 'country': ['Brazil'], 'period_end': [pd.Timestamp('2022-12-31')],
+                             'release_date': [pd.Timestamp('2023-02-15')], 'value': [5.0]})
+
+    table = release_table(indicators, lags={cpi: 3}, vintages=vintages)
+    dates = pd.bdate_range('2022-06-01', '2023-09-29')
+    market = pd.DataFrame({'^IDX': np.arange(len(dates), dtype=float)}, index=dates)
+    daily = MarketPanel(market, release_frame(table), dtype=None).broadcast_macro()
+
+    # Annual GDP is published six months after the year ends: 2021 on 2022-06-30, 2022 on 2023-06-30
+    growth = daily[(gdp, 'Brazil')]
+    assert growth[:'2022-06-29'].isna().all()
+    assert (growth['2022-06-30':'2023-06-29'] == 1.5).all()
+    assert (growth['2023-06-30':] == 2.5).all()
+    # 2021 inflation with its 3-month lag (2022-03-31) is in effect from the first row
+    inflation = daily[(cpi, 'Brazil')]
+    assert (inflation[:'2023-02-14'] == 4.0).all()
+    assert (inflation['2023-02-15':] == 5.0).all()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from panel import MarketPanel
+from schema import FeatureSchema
+from synthetic import make_registry
+
+
+def test_with_macro_keeps_releases_on_news_rows():
+    dates = pd.bdate_range('2024-01-01', periods=10)
+    market = pd.DataFrame({'^IDX': np.arange(10.0)}, index=dates)
+    releases = pd.DataFrame({('GDP growth (annual %)', 'Brazil'): [2.0, 3.0]}, index=pd.to_datetime(['2023-12-01', '2024-01-08']))
+    tone = pd.DataFrame({('News tone (mean)', 'Brazil'): [-1.0, 0.5]}, index=pd.to_datetime(['2024-01-03', '2024-01-06']))
+
+    panel = MarketPanel(market, releases, dtype=None).with_macro(tone)
+    daily = MarketPanel.from_frame(panel.to_frame(), dtype=None).broadcast_macro()
+
+    gdp = daily[('GDP growth (annual %)', 'Brazil')]
+    assert (gdp[:'2024-01-05'] == 2.0).all() and (gdp['2024-01-08':] == 3.0).all()
+    news = daily[('News tone (mean)', 'Brazil')]
+    assert news[:'2024-01-02'].isna().all()
+    # The Saturday reading lands on the Monday after it
+    assert news['2024-01-03':'2024-01-05'].eq(-1.0).all() and news['2024-01-08':].eq(0.5).all()
+
+
+def test_with_macro_counts_are_zero_on_days_without_news():
+    dates = pd.bdate_range('2024-01-01', periods=10)
+    market = pd.DataFrame({'^IDX': np.arange(10.0)}, index=dates)
+    tone = ('News tone (mean)', 'Brazil')
+    events = ('News events', 'Brazil')
+    news = pd.DataFrame({tone: [-1.0, 0.5, 0.25], events: [3.0, 2.0, 4.0]}, index=pd.to_datetime(['2024-01-03', '2024-01-06', '2024-01-08']))
+
+    panel = MarketPanel(market, pd.DataFrame(index=dates[:0]), dtype=None).with_macro(news, counts=[events])
+    daily = MarketPanel.from_frame(panel.to_frame(), dtype=None).broadcast_macro()
+
+    # Unknown before the first observation, 0 on quiet days, weekend counts added to Monday
+    assert daily[events][:'2024-01-02'].isna().all()
+    assert daily[events]['2024-01-03':].tolist() == [3.0, 0.0, 0.0, 6.0, 0.0, 0.0, 0.0, 0.0]
+    assert daily[tone]['2024-01-04':'2024-01-05'].eq(-1.0).all() and daily[tone]['2024-01-09':].eq(0.25).all()
+
+
+def test_news_aggregates_are_index_inputs():
+    registry = make_registry(1, 1)
+    country = registry.countries[0]
+    columns = [('GDP growth (annual %)', country.name), ('News tone (mean)', country.name), ('News events', country.name), country.index, f'{country.index}_volatility']
+
+    schema = FeatureSchema.build(columns, registry)
+
+    assert schema.columns(country.code) == columns[1:]
+    assert schema.columns(country.code, asset_classes=('macro',), kinds=('macro',)) == columns[:1]
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from pipeline import Stage, run_pipeline
+from storage import load_frame, save_frame
+
+
+def toy_stages(data_dir, runs, shift=0.0, offset=0.0, window=2):
+    def record(name, frame):
+        runs.append(name)
+        save_frame(frame, name, data_dir)
+
+    def prices(shift):
+        record('prices', pd.DataFrame({'close': [1.0, 2.0, 4.0, 3.0]}) + shift)
+
+    def returns():
+        record('returns', load_frame('prices', data_dir=data_dir).pct_change())
+
+    def volatility(window):
+        record('volatility', load_frame('returns', data_dir=data_dir).rolling(window).std())
+
+    def calendar(offset):
+        record('calendar', pd.DataFrame({'day': [0.0, 1.0, 2.0, 3.0]}) + offset)
+
+    return [
+        Stage('volatility', volatility, inputs=['returns'], outputs=['volatility'], params={'window': window}),
+        Stage('returns', returns, inputs=['prices'], outputs=['returns']),
+        Stage('prices', prices, outputs=['prices'], params={'shift': shift}),
+        Stage('calendar', calendar, outputs=['calendar'], params={'offset': offset}),
+    ]
+
+
+def test_changed_parameter_reruns_only_dependent_stages(tmp_path):
+    data_dir = str(tmp_path)
+    runs = []
+    assert set(run_pipeline(toy_stages(data_dir, runs), data_dir=data_dir).values()) == {'ran'}
+    assert runs.index('prices') < runs.index('returns') < runs.index('volatility')
+
+    # Nothing changed: every stage is served from the manifest
+    runs.clear()
+    assert set(run_pipeline(toy_stages(data_dir, runs), data_dir=data_dir).values()) == {'cached'}
+    assert runs == []
+
+    # A parameter of the last stage reruns only that stage
+    status = run_pipeline(toy_stages(data_dir, runs, window=3), data_dir=data_dir)
+    assert runs == ['volatility']
+    assert status == {'prices': 'cached', 'returns': 'cached', 'volatility': 'ran', 'calendar': 'cached'}
+
+    # A parameter upstream reruns its downstream chain, but not the unrelated stage
+    runs.clear()
+    status = run_pipeline(toy_stages(data_dir, runs, shift=1.0, window=3), data_dir=data_dir)
+    assert runs == ['prices', 'returns', 'volatility']
+    assert status['calendar'] == 'cached'
+
+    runs.clear()
+    status = run_pipeline(toy_stages(data_dir, runs, shift=1.0, offset=1.0, window=3), data_dir=data_dir)
+    assert runs == ['calendar']
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from price_store import PriceStore
+from providers import LocalProvider
+from synthetic import make_market, make_registry
+
+
+@pytest.fixture
+def provider():
+    registry = make_registry(2, 3)
+    market = make_market(registry, 2)
+    return LocalProvider(prices=market[registry.index_tickers])
+
+
+def test_refresh_appends_only_the_new_days(tmp_path, provider):
+    tickers = list(provider.prices.columns)
+    store = PriceStore(data_dir=str(tmp_path))
+    store.refresh(tickers, '2000-06-01', provider, start_date='2000-01-01')
+    mark = store.high_water_mark(tickers[0])
+
+    # A new process reloads the marks from disk
+    store = PriceStore(data_dir=str(tmp_path))
+    store.refresh(tickers, '2000-09-01', provider, start_date='2000-01-01')
+
+    assert provider.calls[1:] == [(tuple(tickers), (mark + pd.Timedelta(days=1)).strftime('%Y-%m-%d'), '2000-09-01')]
+    assert not store.prices.duplicated(['ticker', 'date']).any()
+    expected = provider.prices.loc['2000-01-01':'2000-08-31', tickers]
+    pd.testing.assert_frame_equal(store.closes(tickers, '2000-01-01', '2000-09-01'), expected, check_freq=False, check_names=False, check_index_type=False, check_column_type=False)
+
+    # Nothing missing: no provider call at all
+    assert store.refresh(tickers, '2000-09-01', provider, start_date='2000-01-01') == 0
+    assert len(provider.calls) == 2
+
+
+def test_earlier_start_backfills_before_the_stored_history(tmp_path, provider):
+    tickers = list(provider.prices.columns)
+    store = PriceStore(data_dir=str(tmp_path))
+    store.refresh(tickers, '2000-06-01', provider, start_date='2000-03-01')
+
+    store.refresh(tickers, '2000-06-01', provider, start_date='2000-01-01')
+
+    assert provider.calls[1:] == [(tuple(tickers), '2000-01-01', '2000-03-01')]
+    assert store.low_water_mark(tickers[0]) == pd.Timestamp('2000-01-01')
+    expected = provider.prices.loc['2000-01-01':'2000-05-31', tickers]
+    pd.testing.assert_frame_equal(store.closes(tickers, '2000-01-01', '2000-06-01'), expected, check_freq=False, check_names=False, check_index_type=False, check_column_type=False)
+
+
+def test_ticker_without_data_is_not_refetched_from_the_start(tmp_path, provider):
+    store = PriceStore(data_dir=str(tmp_path))
+    store.refresh(['MISSING'], '2000-06-01', provider, start_date='2000-01-01')
+    store.refresh(['MISSING'], '2000-09-01', provider, start_date='2000-01-01')
+
+    assert provider.calls == [(('MISSING',), '2000-01-01', '2000-06-01'), (('MISSING',), '2000-06-01', '2000-09-01')]
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from providers import LocalProvider
+from synthetic import make_market, make_registry
+
+
+@pytest.fixture(scope='module')
+def market():
+    registry = make_registry(2, 3)
+    return registry, make_market(registry, 2)
+
+
+def test_fetch_prices_window_is_end_exclusive(market):
+    registry, frame = market
+    prices = frame[[col for col in frame.columns if isinstance(col, str)]]
+    provider = LocalProvider(prices=prices)
+    tickers = registry.index_tickers + ['MISSING']
+
+    closes = provider.fetch_prices(tickers, '2000-02-01', '2000-03-01')
+
+    assert list(closes.columns) == registry.index_tickers
+    assert closes.index.min() >= pd.Timestamp('2000-02-01')
+    assert closes.index.max() < pd.Timestamp('2000-03-01')
+    assert closes.index.name == 'date'
+    pd.testing.assert_frame_equal(closes, prices.loc['2000-02-01':'2000-02-29', registry.index_tickers], check_freq=False, check_names=False)
+    assert provider.calls == [(tuple(tickers), '2000-02-01', '2000-03-01')]
+
+
+def test_fetch_indicators_needs_indicator_data(market):
+    registry, _ = market
+    with pytest.raises(ValueError):
+        LocalProvider().fetch_indicators(registry.indicators, registry.codes, '2000-01-01', '2001-01-01')
+    indicators = pd.DataFrame({'GDP growth (annual %)': [1.0]})
+    assert LocalProvider(indicators=indicators).fetch_indicators(registry.indicators, registry.codes, '2000-01-01', '2001-01-01') is indicators
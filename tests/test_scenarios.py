@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import add_volatility_features
+from incremental_index import extend_index
+from scenarios import ScenarioEngine, run_scenarios
+from schema import FeatureSchema
+from storage import save_frame
+from synthetic import make_market, make_registry
+
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    # Published artifacts of a daily run: featured dataset, index history and index state
+    data_dir = str(tmp_path_factory.mktemp('data'))
+    registry = make_registry(2, 2)
+    featured = add_volatility_features(make_market(registry, 3), registry.market_tickers)
+    save_frame(featured, 'featured_dataset', data_dir)
+    schema = FeatureSchema.build(featured.columns, registry)
+    history = {country.code: extend_index(country.code, featured[schema.columns(country.code)], anchor=country.index, data_dir=data_dir)[0]
+               for country in registry.countries}
+    save_frame(pd.DataFrame(history), 'full_stability_index', data_dir)
+    return registry, data_dir, ScenarioEngine(registry, data_dir=data_dir)
+
+
+def test_simulated_paths_have_one_value_per_day_and_feature(engine):
+    registry, _, engine = engine
+    returns = engine.simulate_returns(50, 21, 'bootstrap', np.random.default_rng(0))
+    assert returns.shape == (50, 21, len(registry.market_tickers))
+
+    features = engine.features(returns)
+    assert features.shape == (50, 21, len(engine.plan))
+    assert np.isfinite(features).all()
+    index_paths = features @ engine.weights + engine.offset
+    assert index_paths.shape == (50, 21, len(registry.countries))
+
+
+def test_outlook_distribution(engine):
+    registry, _, engine = engine
+    scenarios = {'baseline': {}, 'index vol x2': {'vol': {ticker: 2.0 for ticker in registry.index_tickers}}}
+    results = run_scenarios(scenarios, paths=3000, seed=5, engine=engine)
+
+    assert len(results) == len(scenarios) * len(registry.countries)
+    assert (results['p05'] <= results['p50']).all() and (results['p50'] <= results['p95']).all()
+    probabilities = results[['prob_bullish', 'prob_neutral', 'prob_cautious']]
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    # With the 7/14-day windows the short-window std is at most sqrt(13/6) ~ 1.47 times the
+    # long one, so the 1.5 Cautious threshold is out of reach whatever the scenario
+    assert (results['prob_cautious'] == 0).all()
+    assert (results['prob_bullish'] > 0).any()
+
+    # Seeded: the same distribution again
+    pd.testing.assert_frame_equal(run_scenarios(scenarios, paths=3000, seed=5, engine=engine), results)
+
+
+
+def test_cautious_needs_a_ratio_below_the_window_bound(engine):
+    registry, data_dir, _ = engine
+    # Below sqrt(13/6) a volatile final week can register as Cautious
+    lowered = ScenarioEngine(registry, outlook={'cautious_ratio': 1.2}, data_dir=data_dir)
+    results = lowered.run({'vol': {ticker: 2.0 for ticker in registry.index_tickers}}, paths=3000, seed=5)
+    assert (results['prob_cautious'] > 0).any()
@@ -0,0 +1,24 @@
+import os
+import sys
+import types
+
+import sentiment
+
+
+def test_finbert_loads_once_per_process_worker(tmp_path, monkeypatch):
+    loads = tmp_path / 'loads.txt'
+
+    def pipeline(task, model, top_k):
+        # Stub model: one line per load, from whichever process loads it
+        with open(loads, 'a') as f:
+            f.write(f'{os.getpid()}\n')
+        return lambda texts, batch_size, truncation: [[{'label': 'positive', 'score': 0.75}, {'label': 'negative', 'score': 0.25}] for _ in texts]
+
+    monkeypatch.setitem(sys.modules, 'transformers', types.SimpleNamespace(pipeline=pipeline))
+    texts = [f'headline {i}' for i in range(12 * 4)]
+
+    scores = sentiment.score_texts(texts, sentiment.FinBertScorer(), batch_size=4, workers=2, executor='process')
+
+    assert scores.tolist() == [0.5] * len(texts)
+    pids = loads.read_text().split()
+    assert len(pids) == len(set(pids)) <= 2
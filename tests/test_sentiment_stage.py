@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+import backend
+import sentiment
+import storage
+from panel import MarketPanel
+from pipeline import run_pipeline
+
+
+class CountingScorer:
+    name = 'counting-v1'
+
+    def __init__(self):
+        self.calls = 0
+
+    def score(self, texts):
+        self.calls += 1
+        return np.full(len(texts), 0.5)
+
+
+def test_sentiment_stage_runs_through_pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(sentiment, 'DATA_DIR', str(tmp_path))
+    code = backend.REGISTRY.codes[0]
+    headlines = pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-02', '2024-01-02', '2024-01-03']),
+        'country': [code] * 3,
+        'text': ['Stocks rally', 'Currency falls', 'Growth beats forecasts'],
+    })
+    storage.save_frame(headlines, 'news_headlines')
+
+    scorer = CountingScorer()
+    stages = [stage for stage in backend.pipeline_stages(sentiment_scorer=scorer) if stage.name == 'sentiment']
+    assert stages and stages[0].params['scorer_name'] == 'counting-v1'
+
+    assert run_pipeline(stages, data_dir=str(tmp_path)) == {'sentiment': 'ran'}
+    assert scorer.calls == 1
+    features = storage.load_frame('news_sentiment')
+    name = backend.REGISTRY.by_code[code].name
+    assert features[(sentiment.SENTIMENT_FEATURES['mean'], name)].tolist() == [0.5, 0.5]
+    assert features[(sentiment.SENTIMENT_FEATURES['headlines'], name)].tolist() == [2, 1]
+
+    # Unchanged headlines and scorer: the manifest skips the stage
+    assert run_pipeline(stages, data_dir=str(tmp_path)) == {'sentiment': 'cached'}
+
+
+def test_imported_headlines_reach_the_featured_dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(sentiment, 'DATA_DIR', str(tmp_path))
+    dates = pd.bdate_range('2024-01-01', periods=40)
+    market = pd.DataFrame(1.0 + np.random.default_rng(0).random((len(dates), len(backend.REGISTRY.market_tickers))),
+                          index=dates, columns=backend.REGISTRY.market_tickers)
+    storage.save_frame(MarketPanel(market, pd.DataFrame(index=dates[:0]), dtype=None).to_frame(), 'unified_dataset')
+    code = backend.REGISTRY.codes[0]
+    path = tmp_path / 'headlines.csv'
+    pd.DataFrame({'date': ['2024-01-03', '2024-01-03'], 'country': [code, code], 'text': ['Stocks rally', 'Growth beats forecasts']}).to_csv(path, index=False)
+
+    stages = [stage for stage in backend.pipeline_stages(headlines=str(path)) if stage.name in ('headlines', 'sentiment', 'features')]
+    assert run_pipeline(stages, data_dir=str(tmp_path)) == {'headlines': 'ran', 'sentiment': 'ran', 'features': 'ran'}
+
+    featured = MarketPanel.from_frame(storage.load_frame('featured_dataset'), dtype=None).broadcast_macro()
+    mean = featured[(sentiment.SENTIMENT_FEATURES['mean'], backend.REGISTRY.by_code[code].name)]
+    assert mean[:'2024-01-02'].isna().all() and (mean['2024-01-03':] == 1.0).all()
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+import storage
+from storage import enable_table_cache, load_frame, save_frame
+
+
+@pytest.fixture
+def table_cache():
+    enable_table_cache()
+    yield storage
+    enable_table_cache(False)
+
+
+def make_frame(offset=0.0):
+    dates = pd.date_range('2024-01-01', periods=50, name='date')
+    return pd.DataFrame({'A': range(50), ('GDP', 'Brazil'): 1.0 + offset, 'B': 2.0 + offset}, index=dates)
+
+
+def test_cache_keeps_only_requested_columns(tmp_path, table_cache):
+    save_frame(make_frame(), 'panel', str(tmp_path))
+    path = storage.artifact_path('panel', str(tmp_path))
+
+    first = load_frame('panel', columns=['A'], data_dir=str(tmp_path))
+    assert set(storage._TABLE_CACHE[path][1].column_names) == {'A', 'date'}
+    second = load_frame('panel', columns=[('GDP', 'Brazil')], data_dir=str(tmp_path))
+    assert set(storage._TABLE_CACHE[path][1].column_names) == {'A', 'date', 'GDP\x1fBrazil'}
+
+    pd.testing.assert_frame_equal(first, make_frame()[['A']], check_column_type=False, check_freq=False)
+    pd.testing.assert_frame_equal(second, make_frame()[[('GDP', 'Brazil')]], check_column_type=False, check_freq=False)
+    pd.testing.assert_frame_equal(load_frame('panel', data_dir=str(tmp_path)), make_frame(), check_column_type=False, check_freq=False)
+
+
+def test_cache_rereads_rewritten_artifacts_and_evicts(tmp_path, table_cache):
+    save_frame(make_frame(), 'first', str(tmp_path))
+    load_frame('first', data_dir=str(tmp_path))
+    save_frame(make_frame(offset=1.0), 'first', str(tmp_path))
+    assert load_frame('first', columns=['B'], data_dir=str(tmp_path))['B'].iloc[0] == 3.0
+
+    enable_table_cache(max_bytes=1)
+    save_frame(make_frame(), 'second', str(tmp_path))
+    load_frame('first', data_dir=str(tmp_path))
+    load_frame('second', data_dir=str(tmp_path))
+    assert list(storage._TABLE_CACHE) == [storage.artifact_path('second', str(tmp_path))]
@@ -0,0 +1,45 @@
+import asyncio
+import os
+
+import numpy as np
+import pandas as pd
+
+from correlation import returns_matrix
+from features import add_volatility_features
+from incremental_index import extend_index
+from schema import FeatureSchema
+from storage import save_frame
+from streaming import LiveStability, ReplaySource, run
+from synthetic import make_market, make_registry
+
+REPLAY = os.path.join(os.path.dirname(__file__), 'data', 'replay.csv')
+
+
+def test_replay_drives_live_readings(tmp_path):
+    # Published artifacts of a daily run on the market the replay file continues
+    data_dir = str(tmp_path)
+    registry = make_registry(2, 3)
+    market = make_market(registry, 2)
+    featured = add_volatility_features(market, registry.market_tickers)
+    save_frame(featured, 'featured_dataset', data_dir)
+    schema = FeatureSchema.build(featured.columns, registry)
+    history = {country.code: extend_index(country.code, featured[schema.columns(country.code)], anchor=country.index, data_dir=data_dir)[0]
+               for country in registry.countries}
+    save_frame(pd.DataFrame(history), 'full_stability_index', data_dir)
+    save_frame(returns_matrix(market[registry.stock_tickers]), 'stock_returns', data_dir)
+
+    live = LiveStability(registry, data_dir=data_dir)
+    published = []
+    snapshots = asyncio.run(run(ReplaySource.from_csv(REPLAY), live, cadence=60, publish=lambda readings, screener: published.append((readings, screener))))
+
+    quotes = pd.read_csv(REPLAY)
+    # Quotes every 10 seconds for 3 minutes 10: one snapshot per minute plus the final one
+    assert snapshots == len(published) == 4
+    readings, screener = published[-1]
+    assert readings['time'].iloc[0] == pd.Timestamp(quotes['time'].iloc[-1])
+    for country in registry.countries:
+        # One count per quote of the country's index or currency, however many features it feeds
+        expected = quotes['ticker'].isin([country.index, country.currency]).sum()
+        assert readings.set_index('country_code').loc[country.code, 'quotes'] == expected
+    assert np.isfinite(readings['stability_index']).all()
+    assert set(screener['ticker']) == set(registry.stock_tickers)